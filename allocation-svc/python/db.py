@@ -12,14 +12,18 @@ def connect(server='localhost\\SQLEXPRESS', database='budgetdb', trusted=True, u
 def load_table(conn, table_name):
     return pd.read_sql(f"SELECT * FROM [{table_name}]", conn)
 
-def write_allocations(conn, allocations):
+def write_allocations(conn, allocations, batch_size=None):
     """Write allocations (list of dicts or DataFrame) into allocation table using executemany.
     Only writes actual allocations (project_id is not None).
+    Rows are sent with fast_executemany in batches of batch_size rows (a single batch when None).
     """
+    if batch_size is not None and batch_size <= 0:
+        raise ValueError(f"batch_size must be a positive number of rows, got {batch_size}")
+    
     df = allocations if hasattr(allocations, 'to_dict') else pd.DataFrame(allocations)
     
     # Filter out available capacity records (project_id is None)
-    df = df[df['project_id'].notna()].copy()
+    df = df[df['project_id'].notna()]
     
     if len(df) == 0:
         return
@@ -27,15 +31,17 @@ def write_allocations(conn, allocations):
     cur = conn.cursor()
     sql = "INSERT INTO allocation (scenario_id, employee_id, project_id, month, allocation_fraction, cost) VALUES (?,?,?,?,?,?)"
     data = []
-    for idx, row in df.iterrows():
+    rows = zip(df.index, df['scenario_id'], df['employee_id'], df['project_id'],
+               df['month'], df['allocation_fraction'], df['cost'])
+    for idx, scenario_id, employee_id, project_id, month, allocation_fraction, cost in rows:
         try:
             data.append((
-                int(row['scenario_id']), 
-                int(row['employee_id']), 
-                int(row['project_id']) if pd.notna(row['project_id']) else None,
-                str(row['month']), 
-                float(row['allocation_fraction']), 
-                float(row['cost'])
+                int(scenario_id), 
+                int(employee_id), 
+                int(project_id) if pd.notna(project_id) else None,
+                str(month), 
+                float(allocation_fraction), 
+                float(cost)
             ))
         except Exception as e:
             print(f"Warning: Skipping row {idx} due to error: {e}")
@@ -43,7 +49,8 @@ def write_allocations(conn, allocations):
     
     if len(data) > 0:
         cur.fast_executemany = True
-        cur.executemany(sql, data)
+        step = batch_size if batch_size is not None else len(data)
+        for start in range(0, len(data), step):
+            cur.executemany(sql, data[start:start + step])
         cur.commit()
     cur.close()
-
@@ -0,0 +1,91 @@
+"""report_utils.py - Shared helpers for the allocation report scripts
+
+Output settings and views used by run_demo.py, run_demo_with_db.py,
+run_custom_test.py and run_scenario_comparison.py, so that their workbooks
+are written the same way.
+"""
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - Arrow-backed string columns and Parquet files
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Report workbooks are written with xlsxwriter: it is write-only and faster than openpyxl.
+# Its constant_memory mode is left off because pandas writes cells column by column and
+# that mode only keeps rows written in order
+EXCEL_WRITER_ENGINE = 'xlsxwriter'
+
+# Written floats are trimmed to the allocator's precision so float32 values don't leak noise digits
+EXCEL_FLOAT_FORMAT = '%.4f'
+
+# Row keys of the pivot views, in output column order (employee_project is derived
+# from employee_name/project_name after pivoting)
+PIVOT_INDEX_COLS = ['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name']
+
+
+def create_pivot_views(actual_allocations):
+    """Create pivot table views with employee+project as rows and months/quarters as columns.
+    
+    Both pivots are flat frames: the PIVOT_INDEX_COLS key columns and employee_project
+    first, then one column per month/quarter in chronological order.
+    
+    Args:
+        actual_allocations: Project allocation rows (available capacity already excluded)
+    
+    Returns:
+        tuple: (monthly_pivot, quarterly_pivot)
+    """
+    if len(actual_allocations) == 0:
+        return pd.DataFrame(), pd.DataFrame()
+    
+    # Work on just the columns the pivots need
+    df = actual_allocations[PIVOT_INDEX_COLS + ['month', 'allocation_fraction']].copy()
+    
+    # Ensure month is string format (skipped when it already holds only strings, incl. string categories)
+    if not pd.api.types.is_string_dtype(df['month']):
+        df['month'] = df['month'].astype(str)
+    
+    # Repeating label columns are grouped by their integer category codes instead of hashing strings
+    for c in ('employee_name', 'employee_role', 'project_name'):
+        df[c] = df[c].astype('category')
+    
+    # Create monthly pivot: employee+project rows, months as columns
+    monthly_pivot = (
+        df.groupby(PIVOT_INDEX_COLS + ['month'], observed=True)['allocation_fraction']
+        .sum()
+        .unstack('month', fill_value=0.0)
+    )
+    
+    # Order month columns chronologically by their parsed date rather than as strings
+    # (so '2025-2' sorts before '2025-10'); months that don't parse go last
+    month_dates = pd.to_datetime(monthly_pivot.columns.to_series(), format='%Y-%m', errors='coerce')
+    month_dates = month_dates.sort_values(na_position='last', kind='stable')
+    monthly_pivot = monthly_pivot[month_dates.index]
+    month_labels = month_dates.index.to_series()
+    
+    # Map month columns to quarters: YYYY-MM -> YYYY-Qn (e.g., '2025-01' -> '2025-Q1');
+    # months that don't parse are kept as their own column
+    quarter_labels = (
+        month_dates.dt.to_period('Q').dt.strftime('%Y-Q%q')
+    ).where(month_dates.notna(), month_labels)
+    
+    # Create quarterly pivot by summing each quarter's month columns (no second groupby over the rows)
+    # Quarters are ordered by their first month, which keeps them chronological as well
+    quarter_months = monthly_pivot.columns.groupby(quarter_labels.to_numpy())
+    quarter_order = month_dates.groupby(quarter_labels).min().sort_values(na_position='last', kind='stable').index
+    quarterly_pivot = pd.DataFrame(
+        {quarter: monthly_pivot[quarter_months[quarter]].sum(axis=1) for quarter in quarter_order},
+        index=monthly_pivot.index
+    )
+    
+    # Index columns first, then the employee-project key, then the ordered months/quarters
+    monthly_pivot = monthly_pivot.reset_index()
+    monthly_pivot.columns.name = None
+    quarterly_pivot = quarterly_pivot.reset_index()
+    employee_project = monthly_pivot['employee_name'].astype(str) + ' - ' + monthly_pivot['project_name'].astype(str)
+    for pivot in (monthly_pivot, quarterly_pivot):
+        pivot.insert(len(PIVOT_INDEX_COLS), 'employee_project', employee_project)
+    
+    return monthly_pivot, quarterly_pivot
@@ -311,16 +311,17 @@ if not allocs or len(allocs) == 0:
 allocs_df = pd.DataFrame(allocs)
 
 # Separate actual allocations from available capacity
+# actual_allocations gets marker columns added below, so it is the only split that is copied
 actual_allocations = allocs_df[allocs_df['project_id'].notna()].copy()
 # Check if available_capacity column exists (it might not be in all allocator outputs)
 if 'available_capacity' in allocs_df.columns:
-    available_capacity = allocs_df[(allocs_df['available_capacity'] == True) | (allocs_df['project_id'].isna())].copy()
+    available_capacity = allocs_df[(allocs_df['available_capacity'] == True) | (allocs_df['project_id'].isna())]
 else:
-    available_capacity = allocs_df[allocs_df['project_id'].isna()].copy()
+    available_capacity = allocs_df[allocs_df['project_id'].isna()]
 
 # For employee utilization calculation, we need ALL allocations (projects + available capacity)
 # to get the true total utilization per month
-all_allocations_for_util = allocs_df.copy()  # Use all allocations for utilization calculation
+all_allocations_for_util = allocs_df  # Use all allocations for utilization calculation (read-only)
 
 print(f'\nAllocation Summary:')
 print(f'  Actual allocations: {len(actual_allocations)}')
@@ -336,7 +337,7 @@ if len(actual_allocations) > 0:
     if 'no_required_skills' not in actual_allocations.columns:
         actual_allocations['no_required_skills'] = False
     if 'no_required_skills' in actual_allocations.columns:
-        no_skills_allocations = actual_allocations[actual_allocations['no_required_skills'] == True].copy()
+        no_skills_allocations = actual_allocations[actual_allocations['no_required_skills'] == True]
         if len(no_skills_allocations) > 0:
             print(f'\n⚠️  Warning: {len(no_skills_allocations)} allocation(s) made without required skills')
             print(f'  Total cost of no-skills allocations: ${no_skills_allocations["cost"].sum():,.2f}')
@@ -352,7 +353,7 @@ if len(actual_allocations) > 0:
 # Check for skill development allocations
 skill_dev_allocations = pd.DataFrame()
 if 'skill_development' in actual_allocations.columns:
-    skill_dev_allocations = actual_allocations[actual_allocations['skill_development'] == True].copy()
+    skill_dev_allocations = actual_allocations[actual_allocations['skill_development'] == True]
     if len(skill_dev_allocations) > 0:
         print(f'\n📚 Skill Development: {len(skill_dev_allocations)} allocation(s) for skill development')
 
@@ -529,9 +530,9 @@ project_explanations, employee_explanations = generate_variance_explanations(
 )
 
 # Create pivot views
-from run_demo import create_pivot_views
+from report_utils import create_pivot_views
 print('\nCreating pivot views...')
-monthly_pivot, quarterly_pivot = create_pivot_views(allocs_df)
+monthly_pivot, quarterly_pivot = create_pivot_views(actual_allocations)
 print(f'  Monthly pivot: {len(monthly_pivot)} rows')
 print(f'  Quarterly pivot: {len(quarterly_pivot)} rows')
 
@@ -712,9 +713,14 @@ if len(actual_allocations) > 0:
         print(f'    Total FTE: {proj_allocs["allocation_fraction"].sum():.2f}')
         print(f'    Total Cost: ${proj_allocs["cost"].sum():,.2f}')
         print(f'    Allocations:')
-        for _, alloc in proj_allocs.iterrows():
-            print(f'      - {alloc["employee_name"]} ({alloc["employee_role"]}): '
-                  f'{alloc["allocation_fraction"]:.2f} FTE in {alloc["month"]} = ${alloc["cost"]:,.2f}')
+        for name, role, frac, month, cost in zip(
+            proj_allocs['employee_name'].to_numpy(),
+            proj_allocs['employee_role'].to_numpy(),
+            proj_allocs['allocation_fraction'].to_numpy(),
+            proj_allocs['month'].to_numpy(),
+            proj_allocs['cost'].to_numpy()
+        ):
+            print(f'      - {name} ({role}): {frac:.2f} FTE in {month} = ${cost:,.2f}')
     
     print('\nBy Employee:')
     for emp_id in actual_allocations['employee_id'].unique():
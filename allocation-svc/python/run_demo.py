@@ -2,14 +2,151 @@
 This script uses the excel template to load data, run allocator, and write allocations back to Excel and/or database.
 """
 import pandas as pd, json
+import numpy as np
 import os
 import sys
 from pathlib import Path
 from allocate_fully_optimized import fully_optimized_allocator
 from excel_io import create_template
-from db import connect, write_allocations, load_table
-from scenario import create_scenario, record_history
+from db import connect, write_allocations
+from scenario import create_scenario, record_history, scenario_exists
 from config_loader import get_config, get_weights
+from report_utils import EXCEL_FLOAT_FORMAT, EXCEL_WRITER_ENGINE, PYARROW_AVAILABLE, create_pivot_views
+
+# FTE columns are rounded to 4 decimals by the allocator, so float32 holds them without loss.
+# Money columns (cost, cost_per_month, ...) stay float64 so currency totals don't drift.
+FLOAT32_COLUMNS = ('allocation_fraction', 'fte_capacity', 'total_allocated_fte')
+
+# Known input columns are typed at read time (money as float64, months as text). IDs are
+# nullable so a blank cell doesn't abort the read; FTE stays float64 because it feeds the
+# allocator's capacity bounds and is only cast to float32 on the output frames
+INPUT_DTYPES = {
+    'employee_id': 'Int32',
+    'project_id': 'Int32',
+    'fte_capacity': 'float64',
+    'cost_per_month': 'float64',
+    'max_budget': 'float64',
+    'start_month': str,
+    'end_month': str,
+}
+
+# ID columns downcast to the smallest integer type that holds them
+INTEGER_COLUMNS = ('scenario_id', 'employee_id', 'project_id')
+# Label columns stored as category when values repeat enough (unique/rows below the ratio),
+# otherwise as Arrow-backed strings when pyarrow is installed
+CATEGORY_COLUMNS = ('employee_name', 'project_name', 'employee_role', 'month', 'quarter')
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Variance explanations for projects/employees with nothing to report
+PROJECT_FULLY_ALLOCATED_MSG = "Fully allocated or within acceptable variance"
+EMPLOYEE_FULLY_UTILIZED_MSG = "Fully utilized or within acceptable variance"
+NO_ALLOCATIONS_MSG = "No allocations made - check solver status and constraints"
+
+
+def quantize_float32(df, columns=FLOAT32_COLUMNS):
+    """Cast the given columns (where present) to float32 in place and return df."""
+    for c in columns:
+        if c in df.columns:
+            df[c] = df[c].astype('float32')
+    return df
+
+
+def optimize_memory(df):
+    """Downcast numeric columns and compact label columns in place; return df.
+    
+    Repetitive labels become categories, the rest become Arrow-backed strings
+    when pyarrow is available. Groupbys on categorical columns must pass
+    observed=True so that unused category combinations don't produce empty groups.
+    """
+    quantize_float32(df)
+    for c in INTEGER_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], downcast='integer')
+    if len(df) > 0:
+        for c in CATEGORY_COLUMNS:
+            if c not in df.columns:
+                continue
+            if df[c].nunique() / len(df) < CATEGORY_MAX_UNIQUE_RATIO:
+                df[c] = df[c].astype('category')
+            elif PYARROW_AVAILABLE and df[c].dtype == object:
+                df[c] = df[c].astype('string[pyarrow]')
+    return df
+
+
+def _lower_skills(employees, column):
+    """Return column as a lowercased numpy string array ('' for missing values)."""
+    if column not in employees.columns:
+        return np.full(len(employees), '', dtype=str)
+    return employees[column].fillna('').astype(str).str.lower().to_numpy(dtype=str)
+
+
+def parse_required_skills(projects):
+    """Parse each project's required_skills JSON once, in row order ({} when missing or invalid)."""
+    if 'required_skills' not in projects.columns:
+        return [{} for _ in range(len(projects))]
+    parsed = []
+    for raw in projects['required_skills']:
+        try:
+            parsed.append(json.loads(raw))
+        except:
+            parsed.append({})
+    return parsed
+
+
+def build_skill_match_matrix(required_skills, employees):
+    """Build a (projects x employees) boolean skill-match matrix.
+    
+    An employee matches a project when any required technical skill is a substring of
+    their technical skills, or any required functional skill is a substring of their
+    functional skills (case-insensitive). Distinct required skills are collected into a
+    shared vocabulary and each is tested against all employees once; the projects'
+    skill sets are then combined with those hits in a single matrix product.
+    
+    Args:
+        required_skills: Parsed required_skills dicts, one per project (see parse_required_skills)
+        employees: Employees DataFrame
+    """
+    emp_skills_lc = {
+        'technical': _lower_skills(employees, 'technical_skills'),
+        'functional': _lower_skills(employees, 'functional_skills'),
+    }
+    
+    # (kind, lowercased skill) -> vocabulary index, and the vocabulary indices per project
+    vocab = {}
+    project_terms = []
+    for req_skills in required_skills:
+        terms = []
+        for kind in ('technical', 'functional'):
+            for skill in req_skills.get(kind, []):
+                terms.append(vocab.setdefault((kind, skill.lower()), len(vocab)))
+        project_terms.append(terms)
+    
+    # term x employee substring hits, one vectorized test per distinct term
+    term_hits = np.zeros((len(vocab), len(employees)), dtype=np.float32)
+    for (kind, skill), t in vocab.items():
+        term_hits[t] = np.char.find(emp_skills_lc[kind], skill) >= 0
+    
+    project_term_mask = np.zeros((len(required_skills), len(vocab)), dtype=np.float32)
+    for p, terms in enumerate(project_terms):
+        project_term_mask[p, terms] = 1.0
+    
+    # A project matches an employee when any of its terms hits (count of hits > 0)
+    return (project_term_mask @ term_hits) > 0
+
+
+def project_month_counts(projects):
+    """Return the number of months in each project's start_month..end_month span.
+    
+    Months are YYYY-MM strings; spans whose bounds don't parse count as 1 month.
+    """
+    def month_index(column):
+        parts = projects[column].astype(str).str.extract(r'^(\d{4})-(\d{1,2})$').astype(float)
+        return parts[0] * 12 + parts[1], parts[1].between(1, 12)
+    
+    start, start_ok = month_index('start_month')
+    end, end_ok = month_index('end_month')
+    counts = (end - start + 1).clip(lower=0)
+    return counts.where(start_ok & end_ok, 1).astype(int).to_numpy()
 
 
 def generate_variance_explanations(projects, employees, actual_allocations, config=None):
@@ -17,24 +154,56 @@ def generate_variance_explanations(projects, employees, actual_allocations, conf
     if config is None:
         config = {}
     
-    # Calculate project explanations
-    project_explanations = []
-    if len(actual_allocations) > 0:
-        project_costs = actual_allocations.groupby('project_id')['cost'].sum()
-        project_fte = actual_allocations.groupby('project_id')['allocation_fraction'].sum()
-        project_employees = actual_allocations.groupby('project_id')['employee_id'].nunique()
-    else:
-        project_costs = pd.Series(dtype=float)
-        project_fte = pd.Series(dtype=float)
-        project_employees = pd.Series(dtype=int)
+    # Config settings read once for both loops
+    allow_no_skills = config.get('allow_allocation_without_skills', False)
+    max_per_emp = config.get('max_employee_per_project', 0.8)
+    maximize_budget = config.get('maximize_budget_utilization', False)
+    budget_weight_multiplier = config.get('budget_maximization_weight_multiplier', 1.0)
+    enforce_role = config.get('enforce_role_allocation', False)
+    min_role = config.get('min_role_allocation', {})
+    
+    # Nothing was allocated (e.g. infeasible solve): every row gets the same explanation
+    if len(actual_allocations) == 0:
+        return (np.full(len(projects), NO_ALLOCATIONS_MSG, dtype=object),
+                np.full(len(employees), NO_ALLOCATIONS_MSG, dtype=object))
+    
+    # Per-project / per-employee aggregates and scalar totals, computed once up front
+    project_stats = actual_allocations.groupby('project_id').agg(
+        cost=('cost', 'sum'), fte=('allocation_fraction', 'sum'), employees=('employee_id', 'nunique')
+    )
+    project_costs = project_stats['cost']
+    project_fte = project_stats['fte']
+    project_employees = project_stats['employees']
+    employee_stats = actual_allocations.groupby('employee_id').agg(
+        fte=('allocation_fraction', 'sum'), projects=('project_id', 'nunique')
+    )
+    employee_fte = employee_stats['fte']
+    employee_projects = employee_stats['projects']
+    total_allocated_fte = actual_allocations['allocation_fraction'].sum()
+    emp_proj_map = actual_allocations.groupby('employee_id')['project_id'].unique().to_dict()
+    proj_budgets = projects.drop_duplicates('project_id').set_index('project_id')['max_budget']
+    # Budget utilization % per project (0 when the project has no budget)
+    proj_util = (
+        project_costs.reindex(proj_budgets.index, fill_value=0.0) / proj_budgets * 100
+    ).where(proj_budgets > 0, 0.0)
     
     # Calculate total employee capacity
     total_employee_capacity = employees['fte_capacity'].sum()
-    total_employee_cost = employees['cost_per_month'].mean() * total_employee_capacity
+    avg_cost = employees['cost_per_month'].mean()
+    total_employee_cost = avg_cost * total_employee_capacity
     
-    for _, proj in projects.iterrows():
-        pid = proj['project_id']
-        max_budget = float(proj['max_budget'])
+    # Parsed required skills and project x employee skill matches, shared by both loops
+    required_skills = parse_required_skills(projects)
+    skill_match = build_skill_match_matrix(required_skills, employees)
+    matching_employees_by_project = skill_match.sum(axis=1)
+    matching_projects_by_employee = skill_match.sum(axis=0)
+    num_months_by_project = project_month_counts(projects)
+    
+    # Calculate project explanations
+    project_explanations = np.empty(len(projects), dtype=object)
+    for p_idx, proj in enumerate(projects.itertuples(index=False)):
+        pid = proj.project_id
+        max_budget = float(proj.max_budget)
         allocated_cost = project_costs.get(pid, 0.0)
         allocated_fte = project_fte.get(pid, 0.0)
         num_employees = project_employees.get(pid, 0)
@@ -45,15 +214,7 @@ def generate_variance_explanations(projects, employees, actual_allocations, conf
         # Check if under-allocated
         if utilization < 95.0:  # Consider <95% as under-allocated
             # Reason 1: Budget too large
-            try:
-                months = pd.date_range(
-                    start=proj['start_month'] + "-01", 
-                    end=proj['end_month'] + "-01", 
-                    freq='MS'
-                ).strftime('%Y-%m').tolist()
-                num_months = len(months)
-            except:
-                num_months = 1
+            num_months = int(num_months_by_project[p_idx])
             
             max_possible_monthly = total_employee_cost / num_months if num_months > 0 else total_employee_cost
             per_month_budget = max_budget / num_months if num_months > 0 else max_budget
@@ -62,73 +223,42 @@ def generate_variance_explanations(projects, employees, actual_allocations, conf
                 reasons.append(f"Budget too large: ${per_month_budget:,.0f}/month exceeds max possible ${max_possible_monthly:,.0f}/month")
             
             # Reason 2: Not enough employees with matching skills
-            req_skills = {}
-            try:
-                req_skills = json.loads(proj.get('required_skills', '{}'))
-            except:
-                pass
-            
-            matching_employees = 0
-            if req_skills:
-                tech_req = req_skills.get('technical', [])
-                func_req = req_skills.get('functional', [])
-                for _, emp in employees.iterrows():
-                    emp_tech = str(emp.get('technical_skills', '')).lower()
-                    emp_func = str(emp.get('functional_skills', '')).lower()
-                    has_match = False
-                    if tech_req:
-                        has_match = any(t.lower() in emp_tech for t in tech_req)
-                    if not has_match and func_req:
-                        has_match = any(f.lower() in emp_func for f in func_req)
-                    if has_match:
-                        matching_employees += 1
+            req_skills = required_skills[p_idx]
+            matching_employees = int(matching_employees_by_project[p_idx])
             
-            if matching_employees == 0 and not config.get('allow_allocation_without_skills', False):
+            if matching_employees == 0 and not allow_no_skills:
                 reasons.append(f"No employees with required skills (tech: {req_skills.get('technical', [])}, func: {req_skills.get('functional', [])})")
             elif matching_employees < 2:
                 reasons.append(f"Only {matching_employees} employee(s) with matching skills (may limit allocation)")
             
             # Reason 3: Employee capacity constraints
-            total_allocated_fte = actual_allocations['allocation_fraction'].sum() if len(actual_allocations) > 0 else 0
             if total_allocated_fte > total_employee_capacity * 0.9:
                 reasons.append(f"Employee capacity nearly exhausted ({total_allocated_fte:.1f}/{total_employee_capacity:.1f} FTE used)")
             
             # Reason 4: max_employee_per_project limit
-            max_per_emp = config.get('max_employee_per_project', 0.8)
             if max_per_emp < 1.0:
                 max_possible_per_project = max_per_emp * matching_employees * num_months
                 if allocated_fte < max_possible_per_project * 0.8:
                     reasons.append(f"max_employee_per_project={max_per_emp} limits allocation (only {num_employees} employees allocated)")
             
             # Reason 5: Budget maximization not enabled or too weak
-            if not config.get('maximize_budget_utilization', False):
+            if not maximize_budget:
                 reasons.append("Budget maximization disabled (cost minimization prioritized)")
-            elif config.get('budget_maximization_weight_multiplier', 1.0) < 1.0:
-                reasons.append(f"Budget maximization weight too low (multiplier={config.get('budget_maximization_weight_multiplier', 1.0)})")
+            elif budget_weight_multiplier < 1.0:
+                reasons.append(f"Budget maximization weight too low (multiplier={budget_weight_multiplier})")
             
             # Reason 6: Role allocation constraints
-            if config.get('enforce_role_allocation', False):
-                min_role = config.get('min_role_allocation', {})
+            if enforce_role:
                 if any(v > 0 for v in min_role.values()):
                     reasons.append(f"Role allocation constraints may limit allocation (min_role_allocation={min_role})")
         
-        explanation = "; ".join(reasons) if reasons else "Fully allocated or within acceptable variance"
-        project_explanations.append(explanation)
+        project_explanations[p_idx] = "; ".join(reasons) if reasons else PROJECT_FULLY_ALLOCATED_MSG
     
     # Calculate employee explanations
-    employee_explanations = []
-    if len(actual_allocations) > 0:
-        employee_costs = actual_allocations.groupby('employee_id')['cost'].sum()
-        employee_fte = actual_allocations.groupby('employee_id')['allocation_fraction'].sum()
-        employee_projects = actual_allocations.groupby('employee_id')['project_id'].nunique()
-    else:
-        employee_costs = pd.Series(dtype=float)
-        employee_fte = pd.Series(dtype=float)
-        employee_projects = pd.Series(dtype=int)
-    
-    for _, emp in employees.iterrows():
-        eid = emp['employee_id']
-        capacity = float(emp['fte_capacity'])
+    employee_explanations = np.empty(len(employees), dtype=object)
+    for e_idx, emp in enumerate(employees.itertuples(index=False)):
+        eid = emp.employee_id
+        capacity = float(emp.fte_capacity)
         allocated_fte = employee_fte.get(eid, 0.0)
         utilization = (allocated_fte / capacity * 100) if capacity > 0 else 0
         num_projects = employee_projects.get(eid, 0)
@@ -138,24 +268,10 @@ def generate_variance_explanations(projects, employees, actual_allocations, conf
         # Check if under-utilized
         if utilization < 90.0:  # Consider <90% as under-utilized
             # Reason 1: No matching projects
-            emp_tech = str(emp.get('technical_skills', '')).lower()
-            emp_func = str(emp.get('functional_skills', '')).lower()
-            matching_projects = 0
-            for _, proj in projects.iterrows():
-                req_skills = {}
-                try:
-                    req_skills = json.loads(proj.get('required_skills', '{}'))
-                except:
-                    pass
-                tech_req = req_skills.get('technical', [])
-                func_req = req_skills.get('functional', [])
-                has_match = False
-                if tech_req:
-                    has_match = any(t.lower() in emp_tech for t in tech_req)
-                if not has_match and func_req:
-                    has_match = any(f.lower() in emp_func for f in func_req)
-                if has_match or config.get('allow_allocation_without_skills', False):
-                    matching_projects += 1
+            if allow_no_skills:
+                matching_projects = len(projects)
+            else:
+                matching_projects = int(matching_projects_by_employee[e_idx])
             
             if matching_projects == 0:
                 reasons.append("No projects with matching skills and allow_allocation_without_skills=False")
@@ -163,109 +279,35 @@ def generate_variance_explanations(projects, employees, actual_allocations, conf
                 reasons.append(f"{matching_projects} matching project(s) available but not allocated (may be cost/constraint limited)")
             
             # Reason 2: max_employee_per_project limit reached
-            max_per_emp = config.get('max_employee_per_project', 0.8)
             if num_projects > 0 and allocated_fte < capacity * max_per_emp:
                 reasons.append(f"max_employee_per_project={max_per_emp} limits allocation across projects")
             
             # Reason 3: Cost too high
-            emp_cost = float(emp.get('cost_per_month', 0))
-            avg_cost = employees['cost_per_month'].mean()
+            emp_cost = float(getattr(emp, 'cost_per_month', 0))
             if emp_cost > avg_cost * 1.5:
                 reasons.append(f"Cost above average (${emp_cost:,.0f} vs ${avg_cost:,.0f}/month) - cost minimization may prefer cheaper employees")
             
             # Reason 4: All projects fully allocated
             if num_projects > 0:
-                # Check if allocated projects are at capacity
-                proj_utilizations = []
-                for pid in actual_allocations[actual_allocations['employee_id'] == eid]['project_id'].unique():
-                    proj_row = projects[projects['project_id'] == pid]
-                    if len(proj_row) > 0:
-                        proj_budget = float(proj_row.iloc[0]['max_budget'])
-                        proj_allocated = project_costs.get(pid, 0.0)
-                        proj_util = (proj_allocated / proj_budget * 100) if proj_budget > 0 else 0
-                        proj_utilizations.append(proj_util)
-                if all(u > 95 for u in proj_utilizations):
+                # Check if allocated projects are at capacity (projects missing from the sheet are skipped)
+                proj_utilizations = proj_util.reindex(emp_proj_map.get(eid, [])).dropna().to_numpy()
+                if (proj_utilizations > 95).all():
                     reasons.append("All allocated projects are fully utilized")
         
-        explanation = "; ".join(reasons) if reasons else "Fully utilized or within acceptable variance"
-        employee_explanations.append(explanation)
+        employee_explanations[e_idx] = "; ".join(reasons) if reasons else EMPLOYEE_FULLY_UTILIZED_MSG
     
     return project_explanations, employee_explanations
 
 
-def create_pivot_views(allocations_df):
-    """Create pivot table views with employee+project as rows and months/quarters as columns.
-    
-    Returns:
-        tuple: (monthly_pivot, quarterly_pivot)
-    """
-    # Filter to actual allocations only
-    df = allocations_df[allocations_df['project_id'].notna()].copy()
-    
-    if len(df) == 0:
-        return pd.DataFrame(), pd.DataFrame()
-    
-    # Create employee-project key
-    df['employee_project'] = df['employee_name'] + ' - ' + df['project_name']
-    
-    # Ensure month is string format
-    df['month'] = df['month'].astype(str)
-    
-    # Create monthly pivot: employee+project rows, months as columns
-    monthly_pivot = df.pivot_table(
-        index=['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project'],
-        columns='month',
-        values='allocation_fraction',
-        aggfunc='sum',
-        fill_value=0.0
-    ).reset_index()
-    
-    # Rename columns to remove 'month' from column names
-    monthly_pivot.columns.name = None
-    
-    # Create quarter mapping
-    def get_quarter(month_str):
-        """Convert YYYY-MM to quarter string (e.g., '2025-01' -> '2025-Q1')"""
-        try:
-            year, month = month_str.split('-')
-            quarter = (int(month) - 1) // 3 + 1
-            return f"{year}-Q{quarter}"
-        except:
-            return month_str
-    
-    # Add quarter column
-    df['quarter'] = df['month'].apply(get_quarter)
-    
-    # Create quarterly pivot
-    quarterly_pivot = df.pivot_table(
-        index=['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project'],
-        columns='quarter',
-        values='allocation_fraction',
-        aggfunc='sum',
-        fill_value=0.0
-    ).reset_index()
-    
-    # Rename columns to remove 'quarter' from column names
-    quarterly_pivot.columns.name = None
-    
-    # Sort columns: first the index columns, then months/quarters in order
-    def sort_columns(df_pivot, date_cols):
-        """Sort date columns chronologically"""
-        index_cols = [col for col in df_pivot.columns if col not in date_cols]
-        sorted_date_cols = sorted(date_cols)
-        return df_pivot[index_cols + sorted_date_cols]
-    
-    # Get date columns for monthly pivot
-    monthly_date_cols = [col for col in monthly_pivot.columns if col not in 
-                        ['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project']]
-    monthly_pivot = sort_columns(monthly_pivot, monthly_date_cols)
-    
-    # Get date columns for quarterly pivot
-    quarterly_date_cols = [col for col in quarterly_pivot.columns if col not in 
-                          ['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project']]
-    quarterly_pivot = sort_columns(quarterly_pivot, quarterly_date_cols)
-    
-    return monthly_pivot, quarterly_pivot
+def insert_columns_after(df, anchor, columns):
+    """Return a copy of df with columns (name -> values) added right after the anchor column."""
+    df = df.assign(**columns)
+    other_cols = [c for c in df.columns if c not in columns]
+    if anchor in other_cols:
+        anchor_idx = other_cols.index(anchor) + 1
+        df = df[other_cols[:anchor_idx] + list(columns) + other_cols[anchor_idx:]]
+    return df
+
 
 BASE = Path(__file__).resolve().parent
 excel_path = BASE.parent / 'excel' / 'budget_planner_template.xlsx'
@@ -276,10 +318,8 @@ if not excel_path.exists():
     create_template(str(excel_path))
 
 # load
-xls = pd.ExcelFile(str(excel_path))
-employees = pd.read_excel(xls, 'Employees')
-projects = pd.read_excel(xls, 'Projects')
-scenarios = pd.read_excel(xls, 'Scenarios')
+sheets = pd.read_excel(str(excel_path), sheet_name=['Employees', 'Projects', 'Scenarios'], dtype=INPUT_DTYPES)
+employees, projects, scenarios = sheets['Employees'], sheets['Projects'], sheets['Scenarios']
 
 # choose scenario id 1
 scenario_id = 1
@@ -346,23 +386,31 @@ allocs = fully_optimized_allocator(
     config=config,
     weights=weights
 )
-allocs_df = pd.DataFrame(allocs)
+allocs_df = optimize_memory(pd.DataFrame(allocs))
 
 # Separate actual allocations from available capacity
-actual_allocations = allocs_df[allocs_df['project_id'].notna()].copy()
+# Build the project mask once and reuse it for every split below; the splits are
+# read-only, so they aren't copied
+proj_mask = allocs_df['project_id'].notna()
+actual_allocations = allocs_df.loc[proj_mask]
 # Check if available_capacity column exists (it might not be in all allocator outputs)
 if 'available_capacity' in allocs_df.columns:
-    available_capacity = allocs_df[(allocs_df['available_capacity'] == True) | (allocs_df['project_id'].isna())].copy()
+    cap_mask = allocs_df['available_capacity'].eq(True) | ~proj_mask
 else:
-    available_capacity = allocs_df[allocs_df['project_id'].isna()].copy()
+    cap_mask = ~proj_mask
+available_capacity = allocs_df.loc[cap_mask]
 
 # For employee utilization calculation, we need ALL allocations (projects + available capacity)
 # to get the true total utilization per month
-all_allocations_for_util = allocs_df.copy()  # Use all allocations for utilization calculation
+all_allocations_for_util = allocs_df  # Use all allocations for utilization calculation
+
+# Summary totals are computed once and reused for the history record below
+num_actual_allocations = len(actual_allocations)
+total_cost = float(actual_allocations['cost'].sum())
 
 print(f'\nAllocation Summary:')
-print(f'  Actual allocations: {len(actual_allocations)}')
-print(f'  Total cost: ${actual_allocations["cost"].sum():,.2f}')
+print(f'  Actual allocations: {num_actual_allocations}')
+print(f'  Total cost: ${total_cost:,.2f}')
 print(f'  Available capacity records: {len(available_capacity)}')
 if len(available_capacity) > 0:
     print(f'  Total available FTE: {available_capacity["allocation_fraction"].sum():.2f}')
@@ -370,7 +418,7 @@ if len(available_capacity) > 0:
 # Check for allocations without required skills
 no_skills_allocations = pd.DataFrame()
 if 'no_required_skills' in actual_allocations.columns:
-    no_skills_allocations = actual_allocations[actual_allocations['no_required_skills'] == True].copy()
+    no_skills_allocations = actual_allocations.query('no_required_skills == True')
     if len(no_skills_allocations) > 0:
         print(f'\n⚠️  Warning: {len(no_skills_allocations)} allocation(s) made without required skills')
         print(f'  Total cost of no-skills allocations: ${no_skills_allocations["cost"].sum():,.2f}')
@@ -379,7 +427,7 @@ if 'no_required_skills' in actual_allocations.columns:
 # Check for skill development allocations
 skill_dev_allocations = pd.DataFrame()
 if 'skill_development' in actual_allocations.columns:
-    skill_dev_allocations = actual_allocations[actual_allocations['skill_development'] == True].copy()
+    skill_dev_allocations = actual_allocations.query('skill_development == True')
     if len(skill_dev_allocations) > 0:
         print(f'\n📚 Skill Development: {len(skill_dev_allocations)} allocation(s) for skill development')
         print(f'  Total FTE: {skill_dev_allocations["allocation_fraction"].sum():.2f}')
@@ -392,152 +440,96 @@ project_explanations, employee_explanations = generate_variance_explanations(
 
 # Create pivot views
 print('\nCreating pivot views...')
-monthly_pivot, quarterly_pivot = create_pivot_views(allocs_df)
+monthly_pivot, quarterly_pivot = create_pivot_views(actual_allocations)
 print(f'  Monthly pivot: {len(monthly_pivot)} rows')
 print(f'  Quarterly pivot: {len(quarterly_pivot)} rows')
 
-# Write output Excel
-with pd.ExcelWriter(str(out_path), engine='openpyxl') as writer:
-    # Original format sheets
-    allocs_df.to_excel(writer, sheet_name='Allocations', index=False)
-    if len(actual_allocations) > 0:
-        actual_allocations.to_excel(writer, sheet_name='Project_Allocations', index=False)
-    if len(available_capacity) > 0:
-        available_capacity.to_excel(writer, sheet_name='Available_Capacity', index=False)
-    
-    # New pivot format sheets
-    if len(monthly_pivot) > 0:
-        monthly_pivot.to_excel(writer, sheet_name='Monthly_View', index=False)
-        print('  ✓ Created Monthly_View sheet (employee+project rows, month columns)')
-    if len(quarterly_pivot) > 0:
-        quarterly_pivot.to_excel(writer, sheet_name='Quarterly_View', index=False)
-        print('  ✓ Created Quarterly_View sheet (employee+project rows, quarter columns)')
+# Add budget utilization to Projects sheet
+if len(actual_allocations) > 0:
+    # Allocated cost per project, looked up by project_id
+    allocated_cost = projects['project_id'].map(
+        actual_allocations.groupby('project_id')['cost'].sum()
+    ).fillna(0.0)
     
-    # Skill gap report
-    if len(no_skills_allocations) > 0:
-        no_skills_allocations.to_excel(writer, sheet_name='No_Skills_Allocations', index=False)
-        print('  ✓ Created No_Skills_Allocations sheet (allocations without required skills)')
-    if len(skill_dev_allocations) > 0:
-        skill_dev_allocations.to_excel(writer, sheet_name='Skill_Development', index=False)
-        print('  ✓ Created Skill_Development sheet (skill development allocations)')
+    # Budget info goes right after max_budget
+    projects_with_budget = insert_columns_after(projects, 'max_budget', {
+        'allocated_cost': allocated_cost,
+        'remaining_budget': projects['max_budget'] - allocated_cost,
+        'budget_utilization_pct': (allocated_cost / projects['max_budget'] * 100).round(2).fillna(0.0),
+        'explanation_of_variance': project_explanations,
+    })
+else:
+    projects_with_budget = projects.assign(
+        allocated_cost=0.0,
+        remaining_budget=projects['max_budget'],
+        budget_utilization_pct=0.0,
+        explanation_of_variance=NO_ALLOCATIONS_MSG,
+    )
+
+# Add allocation summary to Employees sheet
+if len(actual_allocations) > 0:
+    # Total allocated cost per employee (sum across all project allocations only)
+    employee_costs = actual_allocations.groupby('employee_id')['cost'].sum()
     
-    # Add budget utilization to Projects sheet
-    projects_with_budget = projects.copy()
-    if len(actual_allocations) > 0:
-        # Calculate allocated cost per project
-        project_costs = actual_allocations.groupby('project_id')['cost'].sum().reset_index()
-        project_costs.columns = ['project_id', 'allocated_cost']
-        
-        # Merge with projects
-        projects_with_budget = projects_with_budget.merge(
-            project_costs, 
-            left_on='project_id', 
-            right_on='project_id', 
-            how='left'
-        )
-        projects_with_budget['allocated_cost'] = projects_with_budget['allocated_cost'].fillna(0.0)
-        
-        # Calculate remaining budget and utilization
-        projects_with_budget['remaining_budget'] = projects_with_budget['max_budget'] - projects_with_budget['allocated_cost']
-        projects_with_budget['budget_utilization_pct'] = (
-            (projects_with_budget['allocated_cost'] / projects_with_budget['max_budget'] * 100)
-            .round(2)
-        ).fillna(0.0)
-        
-        # Add explanation of variance
-        projects_with_budget['explanation_of_variance'] = project_explanations
-        
-        # Reorder columns to put budget info near max_budget
-        cols = list(projects_with_budget.columns)
-        budget_cols = ['allocated_cost', 'remaining_budget', 'budget_utilization_pct', 'explanation_of_variance']
-        other_cols = [c for c in cols if c not in budget_cols]
-        if 'max_budget' in other_cols:
-            max_budget_idx = other_cols.index('max_budget')
-            new_cols = other_cols[:max_budget_idx+1] + budget_cols + other_cols[max_budget_idx+1:]
-            projects_with_budget = projects_with_budget[new_cols]
-    else:
-        projects_with_budget['allocated_cost'] = 0.0
-        projects_with_budget['remaining_budget'] = projects_with_budget['max_budget']
-        projects_with_budget['budget_utilization_pct'] = 0.0
-        projects_with_budget['explanation_of_variance'] = "No allocations made - check solver status and constraints"
+    # Average FTE per month (total utilization including available capacity)
+    # Use ALL allocations to get true monthly totals per employee
+    # This represents the total FTE utilization per month (projects + available capacity = total capacity used)
+    monthly_totals_all = all_allocations_for_util.groupby(['employee_id', 'month'], observed=True)['allocation_fraction'].sum()
+    # Mean of the monthly totals and the number of months, for employees with project allocations
+    employee_monthly = (
+        monthly_totals_all.groupby(level='employee_id').agg(['mean', 'size'])
+        .reindex(employee_costs.index)
+    )
     
-    # Add allocation summary to Employees sheet
-    employees_with_allocation = employees.copy()
-    if len(actual_allocations) > 0:
-        # Calculate total allocated cost per employee (sum across all project allocations only)
-        employee_summary = actual_allocations.groupby('employee_id').agg({
-            'cost': 'sum',
-            'allocation_fraction': 'sum'
-        }).reset_index()
-        employee_summary.columns = ['employee_id', 'total_allocated_cost', 'total_fte_months']
-        
-        # Calculate average FTE per month (total utilization including available capacity)
-        # Use ALL allocations to get true monthly totals per employee
-        # This represents the total FTE utilization per month (projects + available capacity = total capacity used)
-        monthly_totals_all = all_allocations_for_util.groupby(['employee_id', 'month'])['allocation_fraction'].sum().reset_index()
-        monthly_totals_all.columns = ['employee_id', 'month', 'monthly_fte_total']
-        
-        # Calculate average FTE per month per employee (mean of monthly totals)
-        # This is the average total FTE utilization per month
-        employee_monthly_avg = monthly_totals_all.groupby('employee_id').agg({
-            'monthly_fte_total': 'mean',  # Average of monthly totals (avg total FTE per month)
-            'month': 'nunique'  # Number of unique months
-        }).reset_index()
-        employee_monthly_avg.columns = ['employee_id', 'avg_fte_per_month', 'unique_months']
-        employee_monthly_avg['avg_fte_per_month'] = employee_monthly_avg['avg_fte_per_month'].round(4)
-        
-        # Merge with employee_summary
-        employee_summary = employee_summary.merge(
-            employee_monthly_avg[['employee_id', 'avg_fte_per_month', 'unique_months']],
-            on='employee_id',
-            how='left'
-        )
-        employee_summary['total_allocated_fte'] = employee_summary['avg_fte_per_month']  # Average FTE per month
-        employee_summary = employee_summary.drop(columns=['total_fte_months'])
-        
-        # Merge with employees
-        employees_with_allocation = employees_with_allocation.merge(
-            employee_summary[['employee_id', 'total_allocated_cost', 'total_allocated_fte', 'unique_months']],
-            left_on='employee_id',
-            right_on='employee_id',
-            how='left'
-        )
-        employees_with_allocation['total_allocated_cost'] = employees_with_allocation['total_allocated_cost'].fillna(0.0)
-        employees_with_allocation['total_allocated_fte'] = employees_with_allocation['total_allocated_fte'].fillna(0.0)
-        employees_with_allocation['unique_months'] = employees_with_allocation['unique_months'].fillna(0).astype(int)
-        
-        # Calculate utilization percentage (average FTE per month / capacity)
-        employees_with_allocation['fte_utilization_pct'] = (
-            (employees_with_allocation['total_allocated_fte'] / employees_with_allocation['fte_capacity'] * 100)
-            .round(2)
-        ).fillna(0.0)
-        
-        # Calculate remaining capacity (capacity - average FTE per month)
-        employees_with_allocation['remaining_fte_capacity'] = (
-            employees_with_allocation['fte_capacity'] - employees_with_allocation['total_allocated_fte']
-        ).round(4)
-        
-        # Add explanation of variance
-        employees_with_allocation['explanation_of_variance'] = employee_explanations
-        
-        # Reorder columns
-        cols = list(employees_with_allocation.columns)
-        alloc_cols = ['total_allocated_cost', 'total_allocated_fte', 'unique_months', 'fte_utilization_pct', 'remaining_fte_capacity', 'explanation_of_variance']
-        other_cols = [c for c in cols if c not in alloc_cols]
-        if 'cost_per_month' in other_cols:
-            cost_idx = other_cols.index('cost_per_month')
-            new_cols = other_cols[:cost_idx+1] + alloc_cols + other_cols[cost_idx+1:]
-            employees_with_allocation = employees_with_allocation[new_cols]
-    else:
-        employees_with_allocation['total_allocated_cost'] = 0.0
-        employees_with_allocation['total_allocated_fte'] = 0.0
-        employees_with_allocation['fte_utilization_pct'] = 0.0
-        employees_with_allocation['remaining_fte_capacity'] = employees_with_allocation['fte_capacity']
-        employees_with_allocation['explanation_of_variance'] = "No allocations made - check solver status and constraints"
+    employee_ids = employees['employee_id']
+    total_allocated_fte = employee_ids.map(employee_monthly['mean'].round(4)).fillna(0.0)
     
-    # Write reference data with budget/utilization info
-    employees_with_allocation.to_excel(writer, sheet_name='Employees', index=False)
-    projects_with_budget.to_excel(writer, sheet_name='Projects', index=False)
+    # Allocation info goes right after cost_per_month
+    employees_with_allocation = insert_columns_after(employees, 'cost_per_month', {
+        'total_allocated_cost': employee_ids.map(employee_costs).fillna(0.0),
+        'total_allocated_fte': total_allocated_fte,
+        'unique_months': employee_ids.map(employee_monthly['size']).fillna(0).astype(int),
+        # Utilization percentage (average FTE per month / capacity)
+        'fte_utilization_pct': (total_allocated_fte / employees['fte_capacity'] * 100).round(2).fillna(0.0),
+        # Remaining capacity (capacity - average FTE per month)
+        'remaining_fte_capacity': (employees['fte_capacity'] - total_allocated_fte).round(4),
+        'explanation_of_variance': employee_explanations,
+    })
+else:
+    employees_with_allocation = employees.assign(
+        total_allocated_cost=0.0,
+        total_allocated_fte=0.0,
+        fte_utilization_pct=0.0,
+        remaining_fte_capacity=employees['fte_capacity'],
+        explanation_of_variance=NO_ALLOCATIONS_MSG,
+    )
+
+# Collect output sheets in workbook order (empty frames are skipped) so that all
+# data preparation is done before a single serialization pass over the workbook
+output_sheets = [
+    ('Allocations', allocs_df, None),
+    ('Project_Allocations', actual_allocations, None),
+    ('Available_Capacity', available_capacity, None),
+    ('Monthly_View', monthly_pivot, '  ✓ Created Monthly_View sheet (employee+project rows, month columns)'),
+    ('Quarterly_View', quarterly_pivot, '  ✓ Created Quarterly_View sheet (employee+project rows, quarter columns)'),
+    ('No_Skills_Allocations', no_skills_allocations, '  ✓ Created No_Skills_Allocations sheet (allocations without required skills)'),
+    ('Skill_Development', skill_dev_allocations, '  ✓ Created Skill_Development sheet (skill development allocations)'),
+    # Reference data with budget/utilization info
+    ('Employees', employees_with_allocation, None),
+    ('Projects', projects_with_budget, None),
+]
+# The allocation frames come from allocs_df, which is already optimized
+optimize_memory(employees_with_allocation)
+optimize_memory(projects_with_budget)
+
+# Write output Excel
+with pd.ExcelWriter(str(out_path), engine=EXCEL_WRITER_ENGINE) as writer:
+    for sheet_name, frame, message in output_sheets:
+        if len(frame) == 0:
+            continue
+        frame.to_excel(writer, sheet_name=sheet_name, index=False, float_format=EXCEL_FLOAT_FORMAT)
+        if message:
+            print(message)
 
 print('✓ Excel output written to', out_path)
 
@@ -567,8 +559,7 @@ if save_to_db:
         
         # Check if scenario exists
         try:
-            existing_scenarios = load_table(conn, 'scenario')
-            if scenario_id not in existing_scenarios['scenario_id'].values:
+            if not scenario_exists(conn, scenario_id):
                 new_scenario_id = create_scenario(conn, scenario_name, created_by)
                 print(f'  Created scenario: {new_scenario_id} - {scenario_name}')
             else:
@@ -584,11 +575,12 @@ if save_to_db:
         
         # Save only actual allocations (not available capacity) to database
         if len(actual_allocations) > 0:
-            # Filter out available capacity records
-            db_allocations = actual_allocations[actual_allocations['project_id'].notna()].copy()
+            # actual_allocations is already filtered by proj_mask
+            db_allocations = actual_allocations
             
-            # Ensure required columns exist
+            # Ensure required columns exist (copy only when a column is added)
             if 'scenario_id' not in db_allocations.columns:
+                db_allocations = db_allocations.copy()
                 db_allocations['scenario_id'] = scenario_id
             
             write_allocations(conn, db_allocations)
@@ -598,7 +590,7 @@ if save_to_db:
         if len(actual_allocations) > 0:
             record_history(
                 conn, scenario_id, 'allocation', None,
-                None, {'count': len(actual_allocations), 'total_cost': float(actual_allocations['cost'].sum())},
+                None, {'count': num_actual_allocations, 'total_cost': total_cost},
                 created_by
             )
             print(f'  ✓ Recorded history log')
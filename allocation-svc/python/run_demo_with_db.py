@@ -7,10 +7,16 @@ import os
 import sys
 from pathlib import Path
 from allocate_fully_optimized import fully_optimized_allocator
-from excel_io import create_template
-from db import connect, write_allocations, load_table
-from scenario import create_scenario, record_history
 from config_loader import get_config
+from report_utils import EXCEL_FLOAT_FORMAT, EXCEL_WRITER_ENGINE, create_pivot_views
+
+# Fields of the allocator's allocation records, in output column order; the flag fields
+# are only present on records they apply to
+ALLOCATION_COLUMNS = [
+    'scenario_id', 'employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name',
+    'month', 'allocation_fraction', 'cost',
+]
+ALLOCATION_FLAG_COLUMNS = ['no_required_skills', 'skill_development', 'available_capacity']
 
 
 def generate_variance_explanations(projects, employees, actual_allocations, config=None):
@@ -182,80 +188,6 @@ def generate_variance_explanations(projects, employees, actual_allocations, conf
     return project_explanations, employee_explanations
 
 
-def create_pivot_views(allocations_df):
-    """Create pivot table views with employee+project as rows and months/quarters as columns.
-    
-    Returns:
-        tuple: (monthly_pivot, quarterly_pivot)
-    """
-    # Filter to actual allocations only
-    df = allocations_df[allocations_df['project_id'].notna()].copy()
-    
-    if len(df) == 0:
-        return pd.DataFrame(), pd.DataFrame()
-    
-    # Create employee-project key
-    df['employee_project'] = df['employee_name'] + ' - ' + df['project_name']
-    
-    # Ensure month is string format
-    df['month'] = df['month'].astype(str)
-    
-    # Create monthly pivot: employee+project rows, months as columns
-    monthly_pivot = df.pivot_table(
-        index=['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project'],
-        columns='month',
-        values='allocation_fraction',
-        aggfunc='sum',
-        fill_value=0.0
-    ).reset_index()
-    
-    # Rename columns to remove 'month' from column names
-    monthly_pivot.columns.name = None
-    
-    # Create quarter mapping
-    def get_quarter(month_str):
-        """Convert YYYY-MM to quarter string (e.g., '2025-01' -> '2025-Q1')"""
-        try:
-            year, month = month_str.split('-')
-            quarter = (int(month) - 1) // 3 + 1
-            return f"{year}-Q{quarter}"
-        except:
-            return month_str
-    
-    # Add quarter column
-    df['quarter'] = df['month'].apply(get_quarter)
-    
-    # Create quarterly pivot
-    quarterly_pivot = df.pivot_table(
-        index=['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project'],
-        columns='quarter',
-        values='allocation_fraction',
-        aggfunc='sum',
-        fill_value=0.0
-    ).reset_index()
-    
-    # Rename columns to remove 'quarter' from column names
-    quarterly_pivot.columns.name = None
-    
-    # Sort columns: first the index columns, then months/quarters in order
-    def sort_columns(df_pivot, date_cols):
-        """Sort date columns chronologically"""
-        index_cols = [col for col in df_pivot.columns if col not in date_cols]
-        sorted_date_cols = sorted(date_cols)
-        return df_pivot[index_cols + sorted_date_cols]
-    
-    # Get date columns for monthly pivot
-    monthly_date_cols = [col for col in monthly_pivot.columns if col not in 
-                        ['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project']]
-    monthly_pivot = sort_columns(monthly_pivot, monthly_date_cols)
-    
-    # Get date columns for quarterly pivot
-    quarterly_date_cols = [col for col in quarterly_pivot.columns if col not in 
-                          ['employee_id', 'employee_name', 'employee_role', 'project_id', 'project_name', 'employee_project']]
-    quarterly_pivot = sort_columns(quarterly_pivot, quarterly_date_cols)
-    
-    return monthly_pivot, quarterly_pivot
-
 BASE = Path(__file__).resolve().parent
 excel_path = BASE.parent / 'excel' / 'budget_planner_template.xlsx'
 out_path = BASE.parent / 'excel' / 'budget_planner_allocations.xlsx'
@@ -266,16 +198,20 @@ DB_NAME = os.getenv('DB_NAME', 'budgetdb')
 DB_USER = os.getenv('DB_USER', None)
 DB_PASSWORD = os.getenv('DB_PASSWORD', None)
 CREATED_BY = os.getenv('CREATED_BY', 'system')
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', '1000'))  # Rows per executemany batch
+
+# The full Allocations sheet repeats every row of Project_Allocations + Available_Capacity,
+# so it is only written on request
+WRITE_FULL_ALLOCATIONS = os.getenv('WRITE_FULL_ALLOCATIONS', '0') == '1'
 
 # Create template if not exists
 if not excel_path.exists():
+    from excel_io import create_template
     create_template(str(excel_path))
 
-# Load data
-xls = pd.ExcelFile(str(excel_path))
-employees = pd.read_excel(xls, 'Employees')
-projects = pd.read_excel(xls, 'Projects')
-scenarios = pd.read_excel(xls, 'Scenarios')
+# Load data: one pass over the workbook for all three sheets
+sheets = pd.read_excel(str(excel_path), sheet_name=['Employees', 'Projects', 'Scenarios'])
+employees, projects, scenarios = sheets['Employees'], sheets['Projects'], sheets['Scenarios']
 
 # Choose scenario id
 scenario_id = 1
@@ -305,19 +241,38 @@ allocs = fully_optimized_allocator(
     global_start=global_start, global_end=global_end,
     config=config
 )
-allocs_df = pd.DataFrame(allocs)
+# Known columns come first and the flag columns always exist for the splits below; any other
+# keys the allocator returns are kept after them. Flag columns that no record sets are only
+# left out of the written sheets, so their layout matches the allocator output
+allocs_df = pd.DataFrame.from_records(allocs)
+extra_columns = [c for c in allocs_df.columns if c not in ALLOCATION_COLUMNS + ALLOCATION_FLAG_COLUMNS]
+allocs_df = allocs_df.reindex(columns=ALLOCATION_COLUMNS + ALLOCATION_FLAG_COLUMNS + extra_columns)
+unused_flag_columns = [c for c in ALLOCATION_FLAG_COLUMNS if allocs_df[c].isna().all()] if len(allocs_df) > 0 else []
+
+# Narrow dtypes once for the pivots, Excel write and DB write. FTE fractions are rounded to
+# 4 decimals by the allocator, so float32 holds them; cost stays float64 so cents don't drift.
+# Groupbys on the categorical month must pass observed=True.
+allocs_df['allocation_fraction'] = allocs_df['allocation_fraction'].astype('float32')
+for c in ('employee_id', 'project_id'):
+    allocs_df[c] = allocs_df[c].astype('Int32')  # nullable: available capacity has no project
+allocs_df['month'] = allocs_df['month'].astype('category')
 
 # Separate actual allocations from available capacity
-actual_allocations = allocs_df[allocs_df['project_id'].notna()].copy()
-available_capacity = allocs_df[(allocs_df['available_capacity'] == True) | (allocs_df['project_id'].isna())].copy()
+# One project mask drives every split; the splits are read-only, so they aren't copied
+proj_mask = allocs_df['project_id'].notna()
+actual_allocations = allocs_df.loc[proj_mask]
+available_capacity = allocs_df.loc[(allocs_df['available_capacity'] == True) | ~proj_mask]
 
 # For employee utilization calculation, we need ALL allocations (projects + available capacity)
 # to get the true total utilization per month
-all_allocations_for_util = allocs_df.copy()  # Use all allocations for utilization calculation
+all_allocations_for_util = allocs_df  # Use all allocations for utilization calculation
+
+# Totals of the project allocations, shared by the summary below and the DB history record
+allocation_totals = actual_allocations[['cost', 'allocation_fraction']].sum()
 
 print(f'\nAllocation Summary:')
 print(f'  Actual allocations: {len(actual_allocations)}')
-print(f'  Total cost: ${actual_allocations["cost"].sum():,.2f}')
+print(f'  Total cost: ${allocation_totals["cost"]:,.2f}')
 print(f'  Available capacity records: {len(available_capacity)}')
 if len(available_capacity) > 0:
     print(f'  Total available FTE: {available_capacity["allocation_fraction"].sum():.2f}')
@@ -330,134 +285,141 @@ project_explanations, employee_explanations = generate_variance_explanations(
 
 # Create pivot views
 print("\nCreating pivot views...")
-monthly_pivot, quarterly_pivot = create_pivot_views(allocs_df)
+monthly_pivot, quarterly_pivot = create_pivot_views(actual_allocations)
 print(f'  Monthly pivot: {len(monthly_pivot)} rows')
 print(f'  Quarterly pivot: {len(quarterly_pivot)} rows')
 
-# Write to Excel
-print("\nWriting to Excel...")
-with pd.ExcelWriter(str(out_path), engine='openpyxl') as writer:
-    # Original format sheets
-    allocs_df.to_excel(writer, sheet_name='Allocations', index=False)
-    if len(actual_allocations) > 0:
-        actual_allocations.to_excel(writer, sheet_name='Project_Allocations', index=False)
-    if len(available_capacity) > 0:
-        available_capacity.to_excel(writer, sheet_name='Available_Capacity', index=False)
+# Add budget utilization to Projects sheet
+projects_with_budget = projects.copy()
+if len(actual_allocations) > 0:
+    project_costs = actual_allocations.groupby('project_id')['cost'].sum().reset_index()
+    project_costs.columns = ['project_id', 'allocated_cost']
+    projects_with_budget = projects_with_budget.merge(
+        project_costs, left_on='project_id', right_on='project_id', how='left'
+    )
+    projects_with_budget['allocated_cost'] = projects_with_budget['allocated_cost'].fillna(0.0)
+    projects_with_budget['remaining_budget'] = projects_with_budget['max_budget'] - projects_with_budget['allocated_cost']
+    projects_with_budget['budget_utilization_pct'] = (
+        (projects_with_budget['allocated_cost'] / projects_with_budget['max_budget'] * 100).round(2)
+    ).fillna(0.0)
+    # Add explanation of variance
+    projects_with_budget['explanation_of_variance'] = project_explanations
+    cols = list(projects_with_budget.columns)
+    budget_cols = ['allocated_cost', 'remaining_budget', 'budget_utilization_pct', 'explanation_of_variance']
+    other_cols = [c for c in cols if c not in budget_cols]
+    if 'max_budget' in other_cols:
+        max_budget_idx = other_cols.index('max_budget')
+        new_cols = other_cols[:max_budget_idx+1] + budget_cols + other_cols[max_budget_idx+1:]
+        projects_with_budget = projects_with_budget[new_cols]
+else:
+    projects_with_budget['allocated_cost'] = 0.0
+    projects_with_budget['remaining_budget'] = projects_with_budget['max_budget']
+    projects_with_budget['budget_utilization_pct'] = 0.0
+    projects_with_budget['explanation_of_variance'] = "No allocations made - check solver status and constraints"
+
+# Add allocation summary to Employees sheet
+employees_with_allocation = employees.copy()
+if len(actual_allocations) > 0:
+    # Calculate total allocated cost per employee (sum across all project allocations only)
+    employee_summary = actual_allocations.groupby('employee_id').agg({
+        'cost': 'sum',
+        'allocation_fraction': 'sum'
+    }).reset_index()
+    employee_summary.columns = ['employee_id', 'total_allocated_cost', 'total_fte_months']
     
-    # New pivot format sheets
-    if len(monthly_pivot) > 0:
-        monthly_pivot.to_excel(writer, sheet_name='Monthly_View', index=False)
-        print('  ✓ Created Monthly_View sheet (employee+project rows, month columns)')
-    if len(quarterly_pivot) > 0:
-        quarterly_pivot.to_excel(writer, sheet_name='Quarterly_View', index=False)
-        print('  ✓ Created Quarterly_View sheet (employee+project rows, quarter columns)')
+    # Calculate average FTE per month (total utilization including available capacity)
+    # Use ALL allocations to get true monthly totals per employee
+    # This represents the total FTE utilization per month (projects + available capacity = total capacity used)
+    monthly_totals_all = all_allocations_for_util.groupby(['employee_id', 'month'], observed=True)['allocation_fraction'].sum().reset_index()
+    monthly_totals_all.columns = ['employee_id', 'month', 'monthly_fte_total']
     
-    # Add budget utilization to Projects sheet
-    projects_with_budget = projects.copy()
-    if len(actual_allocations) > 0:
-        project_costs = actual_allocations.groupby('project_id')['cost'].sum().reset_index()
-        project_costs.columns = ['project_id', 'allocated_cost']
-        projects_with_budget = projects_with_budget.merge(
-            project_costs, left_on='project_id', right_on='project_id', how='left'
-        )
-        projects_with_budget['allocated_cost'] = projects_with_budget['allocated_cost'].fillna(0.0)
-        projects_with_budget['remaining_budget'] = projects_with_budget['max_budget'] - projects_with_budget['allocated_cost']
-        projects_with_budget['budget_utilization_pct'] = (
-            (projects_with_budget['allocated_cost'] / projects_with_budget['max_budget'] * 100).round(2)
-        ).fillna(0.0)
-        # Add explanation of variance
-        projects_with_budget['explanation_of_variance'] = project_explanations
-        cols = list(projects_with_budget.columns)
-        budget_cols = ['allocated_cost', 'remaining_budget', 'budget_utilization_pct', 'explanation_of_variance']
-        other_cols = [c for c in cols if c not in budget_cols]
-        if 'max_budget' in other_cols:
-            max_budget_idx = other_cols.index('max_budget')
-            new_cols = other_cols[:max_budget_idx+1] + budget_cols + other_cols[max_budget_idx+1:]
-            projects_with_budget = projects_with_budget[new_cols]
-    else:
-        projects_with_budget['allocated_cost'] = 0.0
-        projects_with_budget['remaining_budget'] = projects_with_budget['max_budget']
-        projects_with_budget['budget_utilization_pct'] = 0.0
-        projects_with_budget['explanation_of_variance'] = "No allocations made - check solver status and constraints"
+    # Calculate average FTE per month per employee (mean of monthly totals)
+    # This is the average total FTE utilization per month
+    employee_monthly_avg = monthly_totals_all.groupby('employee_id').agg({
+        'monthly_fte_total': 'mean',  # Average of monthly totals (avg total FTE per month)
+        'month': 'nunique'  # Number of unique months
+    }).reset_index()
+    employee_monthly_avg.columns = ['employee_id', 'avg_fte_per_month', 'unique_months']
+    employee_monthly_avg['avg_fte_per_month'] = employee_monthly_avg['avg_fte_per_month'].round(4)
     
-    # Add allocation summary to Employees sheet
-    employees_with_allocation = employees.copy()
-    if len(actual_allocations) > 0:
-        # Calculate total allocated cost per employee (sum across all project allocations only)
-        employee_summary = actual_allocations.groupby('employee_id').agg({
-            'cost': 'sum',
-            'allocation_fraction': 'sum'
-        }).reset_index()
-        employee_summary.columns = ['employee_id', 'total_allocated_cost', 'total_fte_months']
-        
-        # Calculate average FTE per month (total utilization including available capacity)
-        # Use ALL allocations to get true monthly totals per employee
-        # This represents the total FTE utilization per month (projects + available capacity = total capacity used)
-        monthly_totals_all = all_allocations_for_util.groupby(['employee_id', 'month'])['allocation_fraction'].sum().reset_index()
-        monthly_totals_all.columns = ['employee_id', 'month', 'monthly_fte_total']
-        
-        # Calculate average FTE per month per employee (mean of monthly totals)
-        # This is the average total FTE utilization per month
-        employee_monthly_avg = monthly_totals_all.groupby('employee_id').agg({
-            'monthly_fte_total': 'mean',  # Average of monthly totals (avg total FTE per month)
-            'month': 'nunique'  # Number of unique months
-        }).reset_index()
-        employee_monthly_avg.columns = ['employee_id', 'avg_fte_per_month', 'unique_months']
-        employee_monthly_avg['avg_fte_per_month'] = employee_monthly_avg['avg_fte_per_month'].round(4)
-        
-        # Merge with employee_summary
-        employee_summary = employee_summary.merge(
-            employee_monthly_avg[['employee_id', 'avg_fte_per_month', 'unique_months']],
-            on='employee_id',
-            how='left'
-        )
-        employee_summary['total_allocated_fte'] = employee_summary['avg_fte_per_month']  # Average FTE per month
-        employee_summary = employee_summary.drop(columns=['total_fte_months'])
-        
-        # Merge with employees
-        employees_with_allocation = employees_with_allocation.merge(
-            employee_summary[['employee_id', 'total_allocated_cost', 'total_allocated_fte', 'unique_months']],
-            left_on='employee_id',
-            right_on='employee_id',
-            how='left'
-        )
-        employees_with_allocation['total_allocated_cost'] = employees_with_allocation['total_allocated_cost'].fillna(0.0)
-        employees_with_allocation['total_allocated_fte'] = employees_with_allocation['total_allocated_fte'].fillna(0.0)
-        employees_with_allocation['unique_months'] = employees_with_allocation['unique_months'].fillna(0).astype(int)
-        
-        # Calculate utilization percentage (average FTE per month / capacity)
-        employees_with_allocation['fte_utilization_pct'] = (
-            (employees_with_allocation['total_allocated_fte'] / employees_with_allocation['fte_capacity'] * 100).round(2)
-        ).fillna(0.0)
-        
-        # Calculate remaining capacity (capacity - average FTE per month)
-        employees_with_allocation['remaining_fte_capacity'] = (
-            employees_with_allocation['fte_capacity'] - employees_with_allocation['total_allocated_fte']
-        ).round(4)
-        # Add explanation of variance
-        employees_with_allocation['explanation_of_variance'] = employee_explanations
-        cols = list(employees_with_allocation.columns)
-        alloc_cols = ['total_allocated_cost', 'total_allocated_fte', 'unique_months', 'fte_utilization_pct', 'remaining_fte_capacity', 'explanation_of_variance']
-        other_cols = [c for c in cols if c not in alloc_cols]
-        if 'cost_per_month' in other_cols:
-            cost_idx = other_cols.index('cost_per_month')
-            new_cols = other_cols[:cost_idx+1] + alloc_cols + other_cols[cost_idx+1:]
-            employees_with_allocation = employees_with_allocation[new_cols]
-    else:
-        employees_with_allocation['total_allocated_cost'] = 0.0
-        employees_with_allocation['total_allocated_fte'] = 0.0
-        employees_with_allocation['fte_utilization_pct'] = 0.0
-        employees_with_allocation['remaining_fte_capacity'] = employees_with_allocation['fte_capacity']
-        employees_with_allocation['explanation_of_variance'] = "No allocations made - check solver status and constraints"
+    # Merge with employee_summary
+    employee_summary = employee_summary.merge(
+        employee_monthly_avg[['employee_id', 'avg_fte_per_month', 'unique_months']],
+        on='employee_id',
+        how='left'
+    )
+    employee_summary['total_allocated_fte'] = employee_summary['avg_fte_per_month']  # Average FTE per month
+    employee_summary = employee_summary.drop(columns=['total_fte_months'])
+    
+    # Merge with employees
+    employees_with_allocation = employees_with_allocation.merge(
+        employee_summary[['employee_id', 'total_allocated_cost', 'total_allocated_fte', 'unique_months']],
+        left_on='employee_id',
+        right_on='employee_id',
+        how='left'
+    )
+    employees_with_allocation['total_allocated_cost'] = employees_with_allocation['total_allocated_cost'].fillna(0.0)
+    employees_with_allocation['total_allocated_fte'] = employees_with_allocation['total_allocated_fte'].fillna(0.0)
+    employees_with_allocation['unique_months'] = employees_with_allocation['unique_months'].fillna(0).astype(int)
+    
+    # Calculate utilization percentage (average FTE per month / capacity)
+    employees_with_allocation['fte_utilization_pct'] = (
+        (employees_with_allocation['total_allocated_fte'] / employees_with_allocation['fte_capacity'] * 100).round(2)
+    ).fillna(0.0)
     
-    # Write reference data with budget/utilization info
-    employees_with_allocation.to_excel(writer, sheet_name='Employees', index=False)
-    projects_with_budget.to_excel(writer, sheet_name='Projects', index=False)
+    # Calculate remaining capacity (capacity - average FTE per month)
+    employees_with_allocation['remaining_fte_capacity'] = (
+        employees_with_allocation['fte_capacity'] - employees_with_allocation['total_allocated_fte']
+    ).round(4)
+    # Add explanation of variance
+    employees_with_allocation['explanation_of_variance'] = employee_explanations
+    cols = list(employees_with_allocation.columns)
+    alloc_cols = ['total_allocated_cost', 'total_allocated_fte', 'unique_months', 'fte_utilization_pct', 'remaining_fte_capacity', 'explanation_of_variance']
+    other_cols = [c for c in cols if c not in alloc_cols]
+    if 'cost_per_month' in other_cols:
+        cost_idx = other_cols.index('cost_per_month')
+        new_cols = other_cols[:cost_idx+1] + alloc_cols + other_cols[cost_idx+1:]
+        employees_with_allocation = employees_with_allocation[new_cols]
+else:
+    employees_with_allocation['total_allocated_cost'] = 0.0
+    employees_with_allocation['total_allocated_fte'] = 0.0
+    employees_with_allocation['fte_utilization_pct'] = 0.0
+    employees_with_allocation['remaining_fte_capacity'] = employees_with_allocation['fte_capacity']
+    employees_with_allocation['explanation_of_variance'] = "No allocations made - check solver status and constraints"
+
+# Collect output sheets in workbook order (empty optional frames are skipped) so that all
+# data preparation is done before a single serialization pass over the workbook
+output_sheets = [('Allocations', allocs_df.drop(columns=unused_flag_columns), True, None)] if WRITE_FULL_ALLOCATIONS else []
+output_sheets += [
+    # Original format sheets
+    ('Project_Allocations', actual_allocations.drop(columns=unused_flag_columns), False, None),
+    ('Available_Capacity', available_capacity.drop(columns=unused_flag_columns), False, None),
+    # New pivot format sheets
+    ('Monthly_View', monthly_pivot, False, '  ✓ Created Monthly_View sheet (employee+project rows, month columns)'),
+    ('Quarterly_View', quarterly_pivot, False, '  ✓ Created Quarterly_View sheet (employee+project rows, quarter columns)'),
+    # Reference data with budget/utilization info
+    ('Employees', employees_with_allocation, True, None),
+    ('Projects', projects_with_budget, True, None),
+]
+
+# Write to Excel
+print("\nWriting to Excel...")
+with pd.ExcelWriter(str(out_path), engine=EXCEL_WRITER_ENGINE) as writer:
+    for sheet_name, frame, always_write, message in output_sheets:
+        if len(frame) == 0 and not always_write:
+            continue
+        frame.to_excel(writer, sheet_name=sheet_name, index=False, float_format=EXCEL_FLOAT_FORMAT)
+        if message:
+            print(message)
 print(f'✓ Excel output written to {out_path}')
 
 # Save to database
 print("\nSaving to database...")
 try:
+    # The DB helpers pull in pyodbc and its driver manager, so they are only loaded when saving
+    from db import connect, write_allocations
+    from scenario import create_scenario, record_history, scenario_exists
+    
     use_trusted = DB_USER is None or DB_USER == ''
     conn = connect(
         server=DB_SERVER,
@@ -471,8 +433,7 @@ try:
     # Create or verify scenario
     scenario_name = f"Scenario {scenario_id}"
     try:
-        existing_scenarios = load_table(conn, 'scenario')
-        if scenario_id not in existing_scenarios['scenario_id'].values:
+        if not scenario_exists(conn, scenario_id):
             new_scenario_id = create_scenario(conn, scenario_name, CREATED_BY)
             print(f'  ✓ Created scenario: {new_scenario_id} - {scenario_name}')
         else:
@@ -488,11 +449,12 @@ try:
     
     # Save allocations
     if len(actual_allocations) > 0:
-        db_allocations = actual_allocations[actual_allocations['project_id'].notna()].copy()
+        # actual_allocations is already filtered by proj_mask
+        db_allocations = actual_allocations
         if 'scenario_id' not in db_allocations.columns:
-            db_allocations['scenario_id'] = scenario_id
+            db_allocations = db_allocations.assign(scenario_id=scenario_id)
         
-        write_allocations(conn, db_allocations)
+        write_allocations(conn, db_allocations, batch_size=DB_BATCH_SIZE)
         print(f'  ✓ Saved {len(db_allocations)} allocations to database')
         
         # Record history
@@ -500,8 +462,8 @@ try:
             conn, scenario_id, 'allocation', None,
             None, {
                 'count': len(db_allocations), 
-                'total_cost': float(db_allocations['cost'].sum()),
-                'total_fte': float(db_allocations['allocation_fraction'].sum())
+                'total_cost': float(allocation_totals['cost']),
+                'total_fte': round(float(allocation_totals['allocation_fraction']), 4)
             },
             CREATED_BY
         )
@@ -4,12 +4,50 @@ Optionally saves to database if SAVE_TO_DB=true
 """
 import pandas as pd
 import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from pandas.api.types import union_categoricals
 from allocate_fully_optimized import fully_optimized_allocator
 from excel_io import create_template
-from db import connect, write_allocations, load_table
-from scenario import create_scenario, record_history
+from db import connect, write_allocations
+from scenario import create_scenario, record_history, scenario_exists
+from report_utils import EXCEL_WRITER_ENGINE, PYARROW_AVAILABLE
+
+INPUT_SHEETS = ['Employees', 'Projects', 'Scenarios']
+
+
+def load_input_sheets(excel_path, use_cache=False):
+    """Load the input sheets from the template workbook.
+    
+    With use_cache, each sheet is also kept as a Parquet file next to the workbook and
+    read from there until the workbook is modified again.
+    
+    Args:
+        excel_path: Path to the template workbook
+        use_cache: Read/write the Parquet cache (needs pyarrow)
+    
+    Returns:
+        dict: sheet name -> DataFrame
+    """
+    cache_paths = {
+        name: excel_path.with_name(f'{excel_path.stem}.{name.lower()}.parquet') for name in INPUT_SHEETS
+    }
+    use_cache = use_cache and PYARROW_AVAILABLE
+    if use_cache:
+        xlsx_mtime = excel_path.stat().st_mtime
+        if all(p.exists() and p.stat().st_mtime >= xlsx_mtime for p in cache_paths.values()):
+            return {name: pd.read_parquet(p) for name, p in cache_paths.items()}
+    
+    sheets = pd.read_excel(str(excel_path), sheet_name=INPUT_SHEETS)
+    if use_cache:
+        try:
+            for name, p in cache_paths.items():
+                sheets[name].to_parquet(p, index=False)
+        except Exception as e:
+            print(f'Note: could not write Parquet cache: {e}')
+    return sheets
 
 BASE = Path(__file__).resolve().parent
 excel_path = BASE.parent / 'excel' / 'budget_planner_template.xlsx'
@@ -19,11 +57,12 @@ out_path = BASE.parent / 'excel' / 'scenario_comparison.xlsx'
 if not excel_path.exists():
     create_template(str(excel_path))
 
-# Load data
-xls = pd.ExcelFile(str(excel_path))
-employees = pd.read_excel(xls, 'Employees')
-projects = pd.read_excel(xls, 'Projects')
-scenarios = pd.read_excel(xls, 'Scenarios')
+# Load data (set USE_PARQUET_CACHE=true to reuse a Parquet copy of the sheets between runs)
+use_parquet_cache = os.getenv('USE_PARQUET_CACHE', 'false').lower() == 'true'
+sheets = load_input_sheets(excel_path, use_cache=use_parquet_cache)
+employees = sheets['Employees']
+projects = sheets['Projects']
+scenarios = sheets['Scenarios']
 
 global_start = projects['start_month'].min()
 global_end = projects['end_month'].max()
@@ -32,69 +71,16 @@ print("=" * 80)
 print("SCENARIO COMPARISON")
 print("=" * 80)
 
-# Scenario 1: Baseline (current allocations)
-print("\n1. Running Scenario 1 (Baseline)...")
-scenario_id_1 = 1
-allocs_1 = fully_optimized_allocator(
-    employees, projects, scenario_id_1,
-    global_start=global_start, global_end=global_end,
-    weights={
-        'cost_weight': 0.5,
-        'skill_weight': 0.2,
-        'fragmentation_weight': 0.1,
-        'continuity_weight': 0.1,
-        'balance_weight': 0.1,
-        'preference_weight': 0.0,
-        'diversity_weight': 0.0,
-        'leveling_weight': 0.0
-    },
-    config={
-        'max_employee_per_project': 1.0,
-        'min_team_size': 1,
-        'allow_skill_development': False,
-        'skill_dev_max_fte': 0.2,
-        'discrete_allocations': False,
-        'allocation_increments': [0.25, 0.5, 0.75, 1.0],
-        'budget_flexibility': False,
-        'max_budget_borrow': 1,
-        'enable_team_diversity': False,
-        'min_grade_diversity': False,
-        'enable_employee_preferences': False
-    }
-)
-allocs_1_df = pd.DataFrame(allocs_1)
-
-if len(allocs_1) > 0:
-    actual_1 = allocs_1_df[allocs_1_df['project_id'].notna()]
-    print(f"   Allocations: {len(actual_1)}")
-    print(f"   Total cost: ${actual_1['cost'].sum():,.2f}")
-    print(f"   Total FTE allocated: {actual_1['allocation_fraction'].sum():.2f}")
-
-# Scenario 2: Modified scenario with different parameters
-print("\n2. Running Scenario 2 (Modified - Higher Budget & Different Priorities)...")
-
-# Create modified projects for scenario 2
-projects_2 = projects.copy()
+# Create modified projects and optimization weights for scenario 2
 # Increase budgets significantly to allow more allocation
-projects_2['max_budget'] = projects_2['max_budget'] * 2.0  # 100% budget increase
+projects_2 = projects.assign(max_budget=projects['max_budget'] * 2.0)  # 100% budget increase
 
 # Also modify project Alpha to have higher priority (by increasing budget more)
-alpha_idx = projects_2[projects_2['project_name'] == 'Alpha'].index
-if len(alpha_idx) > 0:
-    projects_2.loc[alpha_idx, 'max_budget'] = projects_2.loc[alpha_idx, 'max_budget'] * 1.5
-
-print(f"   Project budgets:")
-for _, proj in projects_2.iterrows():
-    orig_budget = projects[projects['project_id'] == proj['project_id']]['max_budget'].iloc[0]
-    print(f"     {proj['project_name']}: ${orig_budget:,.0f} -> ${proj['max_budget']:,.0f}")
+projects_2.loc[projects_2['project_name'] == 'Alpha', 'max_budget'] *= 1.5
 
 scenario_id_2 = 2
-# Use fully optimized allocator with different weights for scenario 2
-print("   Using fully optimized allocator with different optimization weights...")
-allocs_2 = fully_optimized_allocator(
-    employees, projects_2, scenario_id_2,
-    global_start=global_start, global_end=global_end,
-    weights={
+scenario_2_options = {
+    'weights': {
         'cost_weight': 0.3,  # Lower cost weight
         'skill_weight': 0.3,  # Higher skill weight
         'fragmentation_weight': 0.2,  # Higher fragmentation penalty
@@ -104,7 +90,7 @@ allocs_2 = fully_optimized_allocator(
         'diversity_weight': 0.01,
         'leveling_weight': 0.01
     },
-    config={
+    'config': {
         'max_employee_per_project': 0.8,
         'min_team_size': 1,
         'allow_skill_development': True,
@@ -117,7 +103,84 @@ allocs_2 = fully_optimized_allocator(
         'min_grade_diversity': False,
         'enable_employee_preferences': True
     }
-)
+}
+
+# Set PARALLEL_SCENARIOS=true to solve scenario 2 in a worker process while scenario 1 runs here.
+# Needs the 'fork' start method: this script has no __main__ guard, so a spawned worker would re-run it.
+parallel_scenarios = os.getenv('PARALLEL_SCENARIOS', 'false').lower() == 'true'
+pending_allocs_2 = None
+scenario_executor = None
+if parallel_scenarios and 'fork' in multiprocessing.get_all_start_methods():
+    scenario_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork'))
+    pending_allocs_2 = scenario_executor.submit(
+        fully_optimized_allocator,
+        employees, projects_2, scenario_id_2,
+        global_start=global_start, global_end=global_end,
+        **scenario_2_options
+    )
+
+# The worker is shut down however the scenario runs end, so a failure in scenario 1
+# doesn't leave scenario 2's process behind
+try:
+    # Scenario 1: Baseline (current allocations)
+    print("\n1. Running Scenario 1 (Baseline)...")
+    scenario_id_1 = 1
+    allocs_1 = fully_optimized_allocator(
+        employees, projects, scenario_id_1,
+        global_start=global_start, global_end=global_end,
+        weights={
+            'cost_weight': 0.5,
+            'skill_weight': 0.2,
+            'fragmentation_weight': 0.1,
+            'continuity_weight': 0.1,
+            'balance_weight': 0.1,
+            'preference_weight': 0.0,
+            'diversity_weight': 0.0,
+            'leveling_weight': 0.0
+        },
+        config={
+            'max_employee_per_project': 1.0,
+            'min_team_size': 1,
+            'allow_skill_development': False,
+            'skill_dev_max_fte': 0.2,
+            'discrete_allocations': False,
+            'allocation_increments': [0.25, 0.5, 0.75, 1.0],
+            'budget_flexibility': False,
+            'max_budget_borrow': 1,
+            'enable_team_diversity': False,
+            'min_grade_diversity': False,
+            'enable_employee_preferences': False
+        }
+    )
+    allocs_1_df = pd.DataFrame(allocs_1)
+    
+    if len(allocs_1) > 0:
+        actual_1 = allocs_1_df[allocs_1_df['project_id'].notna()]
+        print(f"   Allocations: {len(actual_1)}")
+        print(f"   Total cost: ${actual_1['cost'].sum():,.2f}")
+        print(f"   Total FTE allocated: {actual_1['allocation_fraction'].sum():.2f}")
+    
+    # Scenario 2: Modified scenario with different parameters
+    print("\n2. Running Scenario 2 (Modified - Higher Budget & Different Priorities)...")
+    print(f"   Project budgets:")
+    # projects_2 is row-aligned with projects, so the original budgets are read positionally
+    for proj_name, orig_budget, new_budget in zip(projects_2['project_name'], projects['max_budget'], projects_2['max_budget']):
+        print(f"     {proj_name}: ${orig_budget:,.0f} -> ${new_budget:,.0f}")
+    
+    # Use fully optimized allocator with different weights for scenario 2
+    print("   Using fully optimized allocator with different optimization weights...")
+    if pending_allocs_2 is not None:
+        allocs_2 = pending_allocs_2.result()
+    else:
+        allocs_2 = fully_optimized_allocator(
+            employees, projects_2, scenario_id_2,
+            global_start=global_start, global_end=global_end,
+            **scenario_2_options
+        )
+finally:
+    if scenario_executor is not None:
+        scenario_executor.shutdown()
+
 allocs_2_df = pd.DataFrame(allocs_2)
 
 if len(allocs_2) > 0:
@@ -135,6 +198,16 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     actual_1 = allocs_1_df[allocs_1_df['project_id'].notna()].copy()
     actual_2 = allocs_2_df[allocs_2_df['project_id'].notna()].copy()
     
+    # The comparison groups by these columns repeatedly: store them as categoricals sharing one
+    # sorted category set, so groupby/merge work on integer codes and both scenarios line up
+    key_cols = ['employee_name', 'project_name', 'month']
+    for col in key_cols:
+        categories = union_categoricals(
+            [actual_1[col].astype('category'), actual_2[col].astype('category')], sort_categories=True
+        ).categories
+        actual_1[col] = pd.Categorical(actual_1[col], categories=categories)
+        actual_2[col] = pd.Categorical(actual_2[col], categories=categories)
+    
     # Summary comparison
     summary_data = []
     summary_data.append({
@@ -171,13 +244,13 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     
     # By Project comparison
     print("\n\nBy Project Comparison:")
-    proj_1 = actual_1.groupby('project_name').agg({
+    proj_1 = actual_1.groupby('project_name', observed=True).agg({
         'cost': 'sum',
         'allocation_fraction': 'sum'
     }).round(2)
     proj_1.columns = ['Cost_S1', 'FTE_S1']
     
-    proj_2 = actual_2.groupby('project_name').agg({
+    proj_2 = actual_2.groupby('project_name', observed=True).agg({
         'cost': 'sum',
         'allocation_fraction': 'sum'
     }).round(2)
@@ -190,13 +263,13 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     
     # By Employee comparison
     print("\n\nBy Employee Comparison:")
-    emp_1 = actual_1.groupby('employee_name').agg({
+    emp_1 = actual_1.groupby('employee_name', observed=True).agg({
         'cost': 'sum',
         'allocation_fraction': 'sum'
     }).round(2)
     emp_1.columns = ['Cost_S1', 'FTE_S1']
     
-    emp_2 = actual_2.groupby('employee_name').agg({
+    emp_2 = actual_2.groupby('employee_name', observed=True).agg({
         'cost': 'sum',
         'allocation_fraction': 'sum'
     }).round(2)
@@ -209,13 +282,13 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     
     # By Month comparison
     print("\n\nBy Month Comparison:")
-    month_1 = actual_1.groupby('month').agg({
+    month_1 = actual_1.groupby('month', observed=True).agg({
         'cost': 'sum',
         'allocation_fraction': 'sum'
     }).round(2)
     month_1.columns = ['Cost_S1', 'FTE_S1']
     
-    month_2 = actual_2.groupby('month').agg({
+    month_2 = actual_2.groupby('month', observed=True).agg({
         'cost': 'sum',
         'allocation_fraction': 'sum'
     }).round(2)
@@ -229,44 +302,29 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     # Detailed comparison - show all allocations side by side
     print("\n\nDetailed Allocation Comparison:")
     
-    # Create full comparison by employee-project-month
-    all_keys = set()
-    for _, row in actual_1.iterrows():
-        key = (row['employee_name'], row['project_name'], row['month'])
-        all_keys.add(key)
-    for _, row in actual_2.iterrows():
-        key = (row['employee_name'], row['project_name'], row['month'])
-        all_keys.add(key)
-    
-    comparison_rows = []
-    for emp_name, proj_name, month in sorted(all_keys):
-        s1_row = actual_1[(actual_1['employee_name'] == emp_name) & 
-                         (actual_1['project_name'] == proj_name) & 
-                         (actual_1['month'] == month)]
-        s2_row = actual_2[(actual_2['employee_name'] == emp_name) & 
-                         (actual_2['project_name'] == proj_name) & 
-                         (actual_2['month'] == month)]
-        
-        fte_s1 = s1_row['allocation_fraction'].sum() if len(s1_row) > 0 else 0.0
-        cost_s1 = s1_row['cost'].sum() if len(s1_row) > 0 else 0.0
-        fte_s2 = s2_row['allocation_fraction'].sum() if len(s2_row) > 0 else 0.0
-        cost_s2 = s2_row['cost'].sum() if len(s2_row) > 0 else 0.0
-        
-        if abs(fte_s1 - fte_s2) > 0.001 or abs(cost_s1 - cost_s2) > 0.01:
-            comparison_rows.append({
-                'employee_name': emp_name,
-                'project_name': proj_name,
-                'month': month,
-                'FTE_S1': round(fte_s1, 4),
-                'FTE_S2': round(fte_s2, 4),
-                'FTE_Delta': round(fte_s2 - fte_s1, 4),
-                'Cost_S1': round(cost_s1, 2),
-                'Cost_S2': round(cost_s2, 2),
-                'Cost_Delta': round(cost_s2 - cost_s1, 2)
-            })
-    
-    if len(comparison_rows) > 0:
-        changed_df = pd.DataFrame(comparison_rows)
+    # Create full comparison by employee-project-month: each scenario is summed per key once
+    # and the two are lined up with an outer merge (keys missing from a scenario count as 0)
+    totals_1 = actual_1.groupby(key_cols, as_index=False, observed=True)[['allocation_fraction', 'cost']].sum()
+    totals_2 = actual_2.groupby(key_cols, as_index=False, observed=True)[['allocation_fraction', 'cost']].sum()
+    merged = (
+        totals_1.rename(columns={'allocation_fraction': 'FTE_S1', 'cost': 'Cost_S1'})
+        .merge(totals_2.rename(columns={'allocation_fraction': 'FTE_S2', 'cost': 'Cost_S2'}),
+               on=key_cols, how='outer')
+        .fillna({'FTE_S1': 0.0, 'Cost_S1': 0.0, 'FTE_S2': 0.0, 'Cost_S2': 0.0})
+        .sort_values(key_cols, ignore_index=True)
+    )
+    merged['FTE_Delta'] = merged['FTE_S2'] - merged['FTE_S1']
+    merged['Cost_Delta'] = merged['Cost_S2'] - merged['Cost_S1']
+    
+    # Changes are judged on the unrounded totals, then FTE is shown to 4 places and cost to 2
+    changed_mask = (merged['FTE_Delta'].abs() > 0.001) | (merged['Cost_Delta'].abs() > 0.01)
+    all_comp_df = merged[key_cols + ['FTE_S1', 'FTE_S2', 'FTE_Delta', 'Cost_S1', 'Cost_S2', 'Cost_Delta']].round({
+        'FTE_S1': 4, 'FTE_S2': 4, 'FTE_Delta': 4,
+        'Cost_S1': 2, 'Cost_S2': 2, 'Cost_Delta': 2
+    })
+    
+    if changed_mask.any():
+        changed_df = all_comp_df[changed_mask]
         print("\nChanged Allocations:")
         print(changed_df.to_string(index=False))
     else:
@@ -277,7 +335,15 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     print("\n" + "=" * 80)
     print("Writing comparison to Excel...")
     
-    with pd.ExcelWriter(str(out_path), engine='openpyxl') as writer:
+    # Set BIG_TABLE_FORMAT=parquet or csv to write the side-by-side comparison (one row per
+    # employee/project/month) to a file next to the workbook instead of a sheet
+    big_table_format = os.getenv('BIG_TABLE_FORMAT', 'xlsx').lower()
+    if big_table_format == 'parquet' and not PYARROW_AVAILABLE:
+        print("Note: pyarrow is not installed, writing the side-by-side comparison as CSV")
+        big_table_format = 'csv'
+    write_big_table_sheet = big_table_format not in ('parquet', 'csv')
+    
+    with pd.ExcelWriter(str(out_path), engine=EXCEL_WRITER_ENGINE) as writer:
         # Summary
         summary_df.to_excel(writer, sheet_name='Summary', index=False)
         
@@ -306,34 +372,7 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
             changed_df.to_excel(writer, sheet_name='Changed_Allocations', index=False)
         
         # Side-by-side comparison
-        all_comparison = []
-        for emp_name, proj_name, month in sorted(all_keys):
-            s1_row = actual_1[(actual_1['employee_name'] == emp_name) & 
-                             (actual_1['project_name'] == proj_name) & 
-                             (actual_1['month'] == month)]
-            s2_row = actual_2[(actual_2['employee_name'] == emp_name) & 
-                             (actual_2['project_name'] == proj_name) & 
-                             (actual_2['month'] == month)]
-            
-            fte_s1 = s1_row['allocation_fraction'].sum() if len(s1_row) > 0 else 0.0
-            cost_s1 = s1_row['cost'].sum() if len(s1_row) > 0 else 0.0
-            fte_s2 = s2_row['allocation_fraction'].sum() if len(s2_row) > 0 else 0.0
-            cost_s2 = s2_row['cost'].sum() if len(s2_row) > 0 else 0.0
-            
-            all_comparison.append({
-                'employee_name': emp_name,
-                'project_name': proj_name,
-                'month': month,
-                'FTE_S1': round(fte_s1, 4),
-                'FTE_S2': round(fte_s2, 4),
-                'FTE_Delta': round(fte_s2 - fte_s1, 4),
-                'Cost_S1': round(cost_s1, 2),
-                'Cost_S2': round(cost_s2, 2),
-                'Cost_Delta': round(cost_s2 - cost_s1, 2)
-            })
-        
-        if len(all_comparison) > 0:
-            all_comp_df = pd.DataFrame(all_comparison)
+        if len(all_comp_df) > 0 and write_big_table_sheet:
             all_comp_df.to_excel(writer, sheet_name='All_Allocations_Comparison', index=False)
         
         # Original data
@@ -343,6 +382,14 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
     
     print(f"✓ Comparison written to: {out_path}")
     
+    if len(all_comp_df) > 0 and not write_big_table_sheet:
+        big_table_path = out_path.with_name(f'{out_path.stem}.all_allocations.{big_table_format}')
+        if big_table_format == 'parquet':
+            all_comp_df.to_parquet(big_table_path, index=False)
+        else:
+            all_comp_df.to_csv(big_table_path, index=False)
+        print(f"✓ Side-by-side comparison written to: {big_table_path}")
+    
     # Optionally save to database
     save_to_db = os.getenv('SAVE_TO_DB', 'false').lower() == 'true'
     if save_to_db:
@@ -353,6 +400,7 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
             db_user = os.getenv('DB_USER', None)
             db_password = os.getenv('DB_PASSWORD', None)
             created_by = os.getenv('CREATED_BY', 'system')
+            db_batch_size = int(os.getenv('DB_BATCH_SIZE', '1000'))  # Rows per executemany batch
             use_trusted = db_user is None or db_user == ''
             
             conn = connect(server=db_server, database=db_name, trusted=use_trusted, user=db_user, password=db_password)
@@ -362,8 +410,7 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
             if len(actual_1) > 0:
                 s1_name = f"Scenario {scenario_id_1} - Baseline"
                 try:
-                    existing = load_table(conn, 'scenario')
-                    if scenario_id_1 not in existing['scenario_id'].values:
+                    if not scenario_exists(conn, scenario_id_1):
                         create_scenario(conn, s1_name, created_by, None)
                 except:
                     create_scenario(conn, s1_name, created_by, None)
@@ -371,15 +418,14 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
                 db_alloc_1 = actual_1[actual_1['project_id'].notna()].copy()
                 if 'scenario_id' not in db_alloc_1.columns:
                     db_alloc_1['scenario_id'] = scenario_id_1
-                write_allocations(conn, db_alloc_1)
+                write_allocations(conn, db_alloc_1, batch_size=db_batch_size)
                 print(f'  ✓ Saved Scenario 1: {len(db_alloc_1)} allocations')
             
             # Save Scenario 2
             if len(actual_2) > 0:
                 s2_name = f"Scenario {scenario_id_2} - Modified"
                 try:
-                    existing = load_table(conn, 'scenario')
-                    if scenario_id_2 not in existing['scenario_id'].values:
+                    if not scenario_exists(conn, scenario_id_2):
                         create_scenario(conn, s2_name, created_by, scenario_id_1)
                 except:
                     create_scenario(conn, s2_name, created_by, scenario_id_1)
@@ -387,7 +433,7 @@ if len(allocs_1) > 0 and len(allocs_2) > 0:
                 db_alloc_2 = actual_2[actual_2['project_id'].notna()].copy()
                 if 'scenario_id' not in db_alloc_2.columns:
                     db_alloc_2['scenario_id'] = scenario_id_2
-                write_allocations(conn, db_alloc_2)
+                write_allocations(conn, db_alloc_2, batch_size=db_batch_size)
                 print(f'  ✓ Saved Scenario 2: {len(db_alloc_2)} allocations')
             
             conn.close()
@@ -13,10 +13,32 @@ def create_scenario(conn, name, created_by, base_scenario_id=None):
     cur.close()
     return sid
 
+def scenario_exists(conn, scenario_id):
+    """Check for a scenario row by id without loading the scenario table."""
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM scenario WHERE scenario_id = ?", (scenario_id,))
+    exists = cur.fetchone() is not None
+    cur.close()
+    return exists
+
 def record_history(conn, scenario_id, table_name, record_id, old_value, new_value, changed_by):
+    record_history_many(conn, [(scenario_id, table_name, record_id, old_value, new_value, changed_by)])
+
+def record_history_many(conn, entries):
+    """Record several history rows with one executemany and a single commit.
+    Each entry is (scenario_id, table_name, record_id, old_value, new_value, changed_by), as for record_history.
+    """
+    if not entries:
+        return
+    timestamp = datetime.utcnow()
+    data = [
+        (scenario_id, table_name, record_id, changed_by, timestamp,
+         json.dumps(old_value) if old_value is not None else None,
+         json.dumps(new_value) if new_value is not None else None)
+        for scenario_id, table_name, record_id, old_value, new_value, changed_by in entries
+    ]
     cur = conn.cursor()
-    cur.execute("INSERT INTO history_log (scenario_id, table_name, record_id, changed_by, timestamp, old_value, new_value) VALUES (?,?,?,?,?,?,?)",
-                (scenario_id, table_name, record_id, changed_by, datetime.utcnow(), json.dumps(old_value) if old_value is not None else None, json.dumps(new_value) if new_value is not None else None))
+    cur.fast_executemany = True
+    cur.executemany("INSERT INTO history_log (scenario_id, table_name, record_id, changed_by, timestamp, old_value, new_value) VALUES (?,?,?,?,?,?,?)", data)
     cur.commit()
     cur.close()
-
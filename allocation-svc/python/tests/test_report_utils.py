@@ -0,0 +1,101 @@
+"""Tests for the pivot views in report_utils.py"""
+import pandas as pd
+import pytest
+
+from report_utils import PIVOT_INDEX_COLS, create_pivot_views
+
+KEY_COLS = PIVOT_INDEX_COLS + ['employee_project']
+
+
+def make_allocations(rows):
+    """Allocation rows from (employee_id, employee_name, project_id, project_name, month, fraction) tuples."""
+    return pd.DataFrame([
+        {
+            'scenario_id': 1, 'employee_id': employee_id, 'employee_name': employee_name,
+            'employee_role': 'Dev', 'project_id': project_id, 'project_name': project_name,
+            'month': month, 'allocation_fraction': fraction, 'cost': 1000.0 * fraction,
+        }
+        for employee_id, employee_name, project_id, project_name, month, fraction in rows
+    ])
+
+
+@pytest.fixture
+def allocations():
+    return make_allocations([
+        (1, 'Alice', 10, 'Alpha', '2025-01', 0.5),
+        (1, 'Alice', 10, 'Alpha', '2024-12', 0.25),
+        (1, 'Alice', 10, 'Alpha', '2024-11', 0.5),
+        (2, 'Bob', 20, 'Beta', '2025-02', 1.0),
+        (2, 'Bob', 20, 'Beta', '2024-10', 0.75),
+    ])
+
+
+def test_empty_allocations():
+    monthly, quarterly = create_pivot_views(make_allocations([]))
+    assert monthly.empty and quarterly.empty
+
+
+def test_months_ordered_across_year_boundary(allocations):
+    monthly, _ = create_pivot_views(allocations)
+    
+    assert list(monthly.columns) == KEY_COLS + ['2024-10', '2024-11', '2024-12', '2025-01', '2025-02']
+    alice = monthly.set_index('employee_name').loc['Alice']
+    assert alice['employee_project'] == 'Alice - Alpha'
+    assert alice[['2024-10', '2024-11', '2024-12', '2025-01', '2025-02']].tolist() == [0.0, 0.5, 0.25, 0.5, 0.0]
+
+
+def test_months_ordered_by_date_not_string():
+    monthly, _ = create_pivot_views(make_allocations([
+        (1, 'Alice', 10, 'Alpha', '2025-10', 0.5),
+        (1, 'Alice', 10, 'Alpha', '2025-2', 0.5),
+    ]))
+    assert list(monthly.columns[len(KEY_COLS):]) == ['2025-2', '2025-10']
+
+
+def test_quarter_labels(allocations):
+    _, quarterly = create_pivot_views(allocations)
+    
+    assert list(quarterly.columns) == KEY_COLS + ['2024-Q4', '2025-Q1']
+    by_employee = quarterly.set_index('employee_name')
+    assert by_employee.loc['Alice', '2024-Q4'] == pytest.approx(0.75)
+    assert by_employee.loc['Alice', '2025-Q1'] == pytest.approx(0.5)
+    assert by_employee.loc['Bob', '2024-Q4'] == pytest.approx(0.75)
+    assert by_employee.loc['Bob', '2025-Q1'] == pytest.approx(1.0)
+
+
+def test_unparseable_months_go_last_with_their_own_label():
+    monthly, quarterly = create_pivot_views(make_allocations([
+        (1, 'Alice', 10, 'Alpha', 'TBD', 0.5),
+        (1, 'Alice', 10, 'Alpha', '2025-03', 0.25),
+        (1, 'Alice', 10, 'Alpha', '2024-12', 0.25),
+    ]))
+    
+    assert list(monthly.columns[len(KEY_COLS):]) == ['2024-12', '2025-03', 'TBD']
+    assert list(quarterly.columns[len(KEY_COLS):]) == ['2024-Q4', '2025-Q1', 'TBD']
+    assert quarterly.loc[0, 'TBD'] == pytest.approx(0.5)
+
+
+def test_non_string_months_are_labelled_as_strings():
+    allocations = make_allocations([
+        (1, 'Alice', 10, 'Alpha', '2024-12', 0.5),
+        (1, 'Alice', 10, 'Alpha', '2025-01', 0.5),
+    ])
+    allocations['month'] = pd.PeriodIndex(allocations['month'], freq='M')
+    
+    monthly, quarterly = create_pivot_views(allocations)
+    assert list(monthly.columns[len(KEY_COLS):]) == ['2024-12', '2025-01']
+    assert list(quarterly.columns[len(KEY_COLS):]) == ['2024-Q4', '2025-Q1']
+
+
+@pytest.mark.parametrize('dtype', ['category', 'string[pyarrow]'])
+def test_categorical_and_arrow_columns_match_object_columns(allocations, dtype):
+    if dtype == 'string[pyarrow]':
+        pytest.importorskip('pyarrow')
+    expected_monthly, expected_quarterly = create_pivot_views(allocations)
+    
+    converted = allocations.astype({c: dtype for c in ('employee_name', 'employee_role', 'project_name', 'month')})
+    monthly, quarterly = create_pivot_views(converted)
+    
+    for result, expected in ((monthly, expected_monthly), (quarterly, expected_quarterly)):
+        assert list(result.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(result.astype(str), expected.astype(str), check_column_type=False)
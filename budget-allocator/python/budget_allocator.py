@@ -1,19 +1,20 @@
 """budget_allocator.py - Cost-based budget allocator using OR-Tools"""
 import pandas as pd
+import numpy as np
 import json
 from datetime import datetime
 from collections import defaultdict
-from ortools.linear_solver import pywraplp
+from ortools.linear_solver import pywraplp, linear_solver_pb2
 from typing import Dict, List, Tuple, Optional
 from utils import (
     months_range, parse_required_skills, calculate_project_priority,
-    check_mandatory_skills, calculate_skill_match_score, calculate_effort_alignment,
+    check_mandatory_skills_matrix, calculate_skill_match_matrix, calculate_effort_alignment,
     generate_allocation_explanation, normalize_driver, parse_available_months
 )
 from config import (
     PRIORITY_WEIGHTS, PRIORITY_WATERFALL_MULTIPLIER, SOLVER_TYPE,
     EFFORT_ESTIMATE_WEIGHT, SKILL_MATCH_WEIGHT, PRIORITY_WEIGHT,
-    REGION_DIVERSITY_WEIGHT, TEAM_ALIGNMENT_WEIGHT
+    REGION_DIVERSITY_WEIGHT, TEAM_ALIGNMENT_WEIGHT, MODEL_NAMES
 )
 import math
 
@@ -49,25 +50,37 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     skill_weight = config.get('skill_match_weight', SKILL_MATCH_WEIGHT)
     priority_weight = config.get('priority_weight', PRIORITY_WEIGHT)
     
-    # Prepare data
-    resources_df = resources_df.copy()
-    projects_df = projects_df.copy()
+    # Derived values are kept in locals rather than added as columns, so the
+    # caller's frames are never copied or modified
+    # Calculate monthly costs for resources (aligned with resources_df rows)
+    resource_cost_per_month = (resources_df['cost_per_year'] / 12.0).astype(float)
     
-    # Calculate monthly costs for resources
-    resources_df['cost_per_month'] = resources_df['cost_per_year'] / 12.0
-    
-    # Calculate project priorities
-    project_priorities = {}
-    # Track funding_source groups and driver caps
+    # Calculate project priorities and track funding_source groups and driver caps in one pass
+    project_priorities = {}  # project_id -> priority score
+    priority_scores = []  # priority score per row of projects_df
     funding_source_groups = defaultdict(list)  # funding_source -> list of project_ids
     funding_source_budgets = defaultdict(float)  # funding_source -> total budget
     driver_caps = {}  # (funding_source, driver) -> total cap (sum of alloc_budget for projects in that driver+funding_source)
     driver_funding_source_groups = defaultdict(lambda: defaultdict(list))  # (funding_source, driver) -> list of project_ids
+    project_user_ranks = {}  # project_id -> user-entered rank (first row for the id)
+    parsed_skills_cache = {}  # required_skills string -> parsed skills (shared, only read below)
     
-    for _, proj_row in projects_df.iterrows():
+    # Rows as plain dicts: no per-row Series, and .get() still covers optional columns
+    project_rows = projects_df.to_dict('records')
+    for proj_row in project_rows:
         pid = int(proj_row['project_id'])
-        priority = calculate_project_priority(proj_row, PRIORITY_WEIGHTS)
-        project_priorities[pid] = priority
+        # Parse required skills once per distinct skills string
+        required_skills = proj_row.get('required_skills')
+        if isinstance(required_skills, str):
+            if required_skills not in parsed_skills_cache:
+                parsed_skills_cache[required_skills] = parse_required_skills(required_skills)
+            proj_row['req_skills_parsed'] = parsed_skills_cache[required_skills]
+        else:
+            proj_row['req_skills_parsed'] = parse_required_skills(required_skills)
+        priority_score = calculate_project_priority(proj_row, PRIORITY_WEIGHTS)
+        priority_scores.append(priority_score)
+        project_priorities[pid] = priority_score
+        project_user_ranks.setdefault(pid, proj_row.get('rank', None))
         
         funding_source = str(proj_row.get('funding_source', '')).strip()
         driver = str(proj_row.get('driver', '')).strip()
@@ -95,8 +108,7 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
             # Get projects with their user-entered rank field
             project_ranks = []
             for pid in project_ids:
-                proj_row = projects_df[projects_df['project_id'] == pid].iloc[0]
-                user_rank = proj_row.get('rank', None)
+                user_rank = project_user_ranks[pid]
                 # Convert rank to number (lower rank number = higher priority)
                 try:
                     rank_num = float(user_rank) if pd.notna(user_rank) else 999
@@ -120,9 +132,8 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
         else:
             funding_source_priorities[funding_source] = 0.5
     
-    # Sort projects by priority (highest first) for waterfall
-    projects_df['priority_score'] = projects_df['project_id'].map(project_priorities)
-    projects_df = projects_df.sort_values('priority_score', ascending=False).reset_index(drop=True)
+    # Order projects by priority (highest first) for waterfall; ties keep input order
+    priority_order = np.argsort(-np.asarray(priority_scores, dtype=np.float64), kind='stable')
     
     # Sort funding sources by priority (highest first) - NEW TOP LEVEL
     sorted_funding_sources = sorted(funding_source_priorities.items(), key=lambda x: x[1], reverse=True)
@@ -140,7 +151,8 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     all_months = set()
     projects_without_effort = []  # Track projects excluded due to missing effort estimate
     
-    for _, proj_row in projects_df.iterrows():
+    for row_idx in priority_order:
+        proj_row = project_rows[row_idx]
         pid = int(proj_row['project_id'])
         
         # Check if effort_estimate_man_months is provided (required)
@@ -155,7 +167,7 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
             projects_without_effort.append(pid)
             continue
         
-        req_skills = parse_required_skills(proj_row.get('required_skills'))
+        req_skills = proj_row['req_skills_parsed']
         start_date = str(proj_row.get('start_date', '2025-01'))
         end_date = str(proj_row.get('end_date', '2025-12'))
         
@@ -216,7 +228,7 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     
     # Parse resource availability
     resource_available_months = {}  # resource_id -> set of available months
-    for _, resource_row in resources_df.iterrows():
+    for resource_row in resources_df.to_dict('records'):
         resource_id = str(resource_row['brid'])
         available_months_str = resource_row.get('available_months', '')
         available_months = parse_available_months(available_months_str, all_months)
@@ -231,16 +243,36 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     if not solver:
         raise RuntimeError('Could not create solver')
     
-    # Decision variables: x[resource_id, project_id, month] = cost allocated
+    # The model is built as an MPModelProto and loaded into the solver in one call, instead of one
+    # SWIG call per variable and coefficient; variables and constraints keep the order they are added in
+    model_proto = linear_solver_pb2.MPModelProto()
+    
+    # Decision variables: x[resource_id, project_id, month] = cost allocated (index into model_proto.variable)
     variables = {}
+    # (resource_id, project_id, month) of each model_proto variable, by index; duplicate resource
+    # rows (same brid) get one variable each, so the dict above can hold fewer entries than this
+    variable_keys = []
+    # The same variables bucketed by the keys the constraints group them on (in creation order)
+    vars_by_resource_month = defaultdict(list)  # (resource_id, month) -> [var]
+    vars_by_project_month = defaultdict(list)  # (project_id, month) -> [var]
+    vars_by_funding_source = defaultdict(list)  # funding_source -> [var]
+    vars_by_project = defaultdict(list)  # project_id -> [(resource_id, month, var)]
     resource_ids = resources_df['brid'].tolist()
     skill_scores = {}  # Cache skill match scores
     team_alignment_scores = {}  # Cache team/sub_team/pod alignment scores
     resource_locations = {}  # Cache resource locations for region diversity
     resource_teams = {}  # Cache resource team/sub_team/pod info
     
+    # Per-resource monthly cost and display name by resource_id, instead of scanning resources_df per lookup
+    resource_brids = resources_df['brid'].astype(str)
+    resource_monthly_costs = dict(zip(resource_brids, resource_cost_per_month))
+    resource_names = (
+        dict(zip(resource_brids, resources_df['employee_name'].astype(str)))
+        if 'employee_name' in resources_df.columns else {}
+    )
+    
     # Build resource location and team maps
-    for _, resource_row in resources_df.iterrows():
+    for resource_row in resources_df.to_dict('records'):
         resource_id = str(resource_row['brid'])
         location = str(resource_row.get('location', '')).strip()
         resource_locations[resource_id] = location
@@ -256,15 +288,18 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     all_locations = set(resource_locations.values())
     max_regions = len(all_locations)  # Maximum possible regions for diversity calculation
     
+    # Mandatory skills (hard constraint) and skill match scores for every resource/project pair,
+    # rows in resources_df order and columns in project_data order
+    project_skills_list = [proj_info['required_skills'] for proj_info in project_data.values()]
+    mandatory_skills_met = check_mandatory_skills_matrix(resources_df, project_skills_list)
+    skill_match_scores = calculate_skill_match_matrix(resources_df, project_skills_list)
+    
     # Create variables only for valid resource-project-month combinations
-    for _, resource_row in resources_df.iterrows():
-        resource_id = str(resource_row['brid'])
-        resource_monthly_cost = float(resource_row['cost_per_month'])
+    for r_idx, (resource_id, resource_monthly_cost) in enumerate(zip(resource_brids, resource_cost_per_month)):
         
-        for pid, proj_info in project_data.items():
+        for p_idx, (pid, proj_info) in enumerate(project_data.items()):
             # Check mandatory skills (hard constraint)
-            can_allocate, _ = check_mandatory_skills(resource_row, proj_info['required_skills'])
-            if not can_allocate:
+            if not mandatory_skills_met[r_idx, p_idx]:
                 continue  # Skip - hard constraint
             
             # HARD CONSTRAINT: Team matching
@@ -338,7 +373,7 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
             team_alignment_scores[(resource_id, pid)] = team_alignment
             
             # Calculate skill match score (fallback if no team alignment)
-            skill_match = calculate_skill_match_score(resource_row, proj_info['required_skills'])
+            skill_match = {key: scores[r_idx, p_idx].item() for key, scores in skill_match_scores.items()}
             skill_scores[(resource_id, pid)] = skill_match
             
             # Get available months for this resource
@@ -350,19 +385,24 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
                 if month not in available_months:
                     continue  # Skip - resource not available in this month
                 
-                var_name = f'x_{resource_id}_p{pid}_m{month}'
+                var_name = f'x_{resource_id}_p{pid}_m{month}' if MODEL_NAMES else ''
                 # Variable represents cost allocated (not FTE)
                 # Upper bound: resource monthly cost (can't allocate more than resource costs)
-                var = solver.NumVar(0.0, resource_monthly_cost, var_name)
+                var = len(model_proto.variable)
+                model_proto.variable.add(lower_bound=0.0, upper_bound=resource_monthly_cost, name=var_name)
+                variable_keys.append((resource_id, pid, month))
                 variables[(resource_id, pid, month)] = var
+                vars_by_resource_month[(resource_id, month)].append(var)
+                vars_by_project_month[(pid, month)].append(var)
+                vars_by_funding_source[proj_info['funding_source']].append(var)
+                vars_by_project[pid].append((resource_id, month, var))
     
     # Constraints
     
     # Constraint 1: Resource capacity - sum of allocations per resource-month ≤ monthly cost
     # Only applies to months when resource is available
     for resource_id in resource_ids:
-        resource_row = resources_df[resources_df['brid'] == resource_id].iloc[0]
-        resource_monthly_cost = float(resource_row['cost_per_month'])
+        resource_monthly_cost = resource_monthly_costs[str(resource_id)]
         available_months = resource_available_months.get(resource_id, set(all_months))
         
         for month in all_months:
@@ -370,10 +410,12 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
             if month not in available_months:
                 continue  # Resource not available in this month, no constraint needed
             
-            constraint = solver.Constraint(0.0, resource_monthly_cost, f'resource_capacity_{resource_id}_{month}')
-            for (rid, pid, m), var in variables.items():
-                if rid == resource_id and m == month:
-                    constraint.SetCoefficient(var, 1.0)
+            constraint = model_proto.constraint.add(
+                lower_bound=0.0, upper_bound=resource_monthly_cost, name=f'resource_capacity_{resource_id}_{month}' if MODEL_NAMES else ''
+            )
+            month_vars = vars_by_resource_month.get((resource_id, month), [])
+            constraint.var_index.extend(month_vars)
+            constraint.coefficient.extend([1.0] * len(month_vars))
     
     # Constraint 2: Budget constraint - sum of allocations per project-month ≤ monthly budget
     # This is ONE of TWO main constraints that limit project allocation:
@@ -387,10 +429,12 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
             monthly_budget = proj_info['alloc_budget'] / num_months if num_months > 0 else 0
             
             for month in proj_info['months']:
-                constraint = solver.Constraint(0.0, monthly_budget, f'budget_p{pid}_m{month}')
-                for (rid, p, m), var in variables.items():
-                    if p == pid and m == month:
-                        constraint.SetCoefficient(var, 1.0)
+                constraint = model_proto.constraint.add(
+                    lower_bound=0.0, upper_bound=monthly_budget, name=f'budget_p{pid}_m{month}' if MODEL_NAMES else ''
+                )
+                month_vars = vars_by_project_month.get((pid, month), [])
+                constraint.var_index.extend(month_vars)
+                constraint.coefficient.extend([1.0] * len(month_vars))
     
     # Note: Efficiency projects (alloc_budget = 0) have no budget constraint
     # They can use unallocated resources up to resource capacity and effort estimate limit
@@ -400,11 +444,12 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     for funding_source, total_budget in funding_source_budgets.items():
         if total_budget > 0:
             # Sum all allocations for projects in this funding_source across all months
-            constraint = solver.Constraint(0.0, total_budget, f'funding_source_budget_{funding_source}')
-            for (rid, pid, month), var in variables.items():
-                proj_info = project_data.get(pid)
-                if proj_info and proj_info.get('funding_source') == funding_source:
-                    constraint.SetCoefficient(var, 1.0)
+            constraint = model_proto.constraint.add(
+                lower_bound=0.0, upper_bound=total_budget, name=f'funding_source_budget_{funding_source}' if MODEL_NAMES else ''
+            )
+            source_vars = vars_by_funding_source.get(funding_source, [])
+            constraint.var_index.extend(source_vars)
+            constraint.coefficient.extend([1.0] * len(source_vars))
     
     # Constraint 3: Max resource allocation percentage per project (PER MONTH)
     # For projects with max_resource_allocation_pct < 1.0, limit how much of a resource
@@ -418,20 +463,16 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     for pid, proj_info in project_data.items():
         max_pct = proj_info.get('max_resource_allocation_pct', 1.0)
         if max_pct < 1.0:  # Only add constraint if less than 100%
-            for resource_id in resource_ids:
-                resource_row = resources_df[resources_df['brid'] == resource_id].iloc[0]
-                resource_monthly_cost = float(resource_row['cost_per_month'])
-                max_allocation_per_month = max_pct * resource_monthly_cost
-                
-                # Add a SEPARATE constraint for EACH month this project is active
-                # Each month gets its own independent limit
-                for month in proj_info['months']:
-                    constraint = solver.Constraint(0.0, max_allocation_per_month,
-                                                  f'max_resource_pct_p{pid}_r{resource_id}_m{month}')
-                    # Find variable for this resource-project-month combination
-                    var_key = (resource_id, pid, month)
-                    if var_key in variables:
-                        constraint.SetCoefficient(variables[var_key], 1.0)
+            # Add a SEPARATE constraint for EACH resource-month this project has a variable for
+            # Each month gets its own independent limit; combinations without a variable need no row
+            for resource_id, month, var in vars_by_project.get(pid, []):
+                max_allocation_per_month = max_pct * resource_monthly_costs[resource_id]
+                constraint = model_proto.constraint.add(
+                    lower_bound=0.0, upper_bound=max_allocation_per_month,
+                    name=f'max_resource_pct_p{pid}_r{resource_id}_m{month}' if MODEL_NAMES else ''
+                )
+                constraint.var_index.append(var)
+                constraint.coefficient.append(1.0)
     
     # Constraint 5: Effort estimate constraint - total FTE-months allocated ≤ effort_estimate_man_months
     # This is ONE of TWO main constraints that limit project allocation:
@@ -446,21 +487,21 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
         if effort_estimate and effort_estimate > 0:
             # Create constraint: sum of FTE-months ≤ effort_estimate_man_months
             # FTE-months = allocated_cost / resource_monthly_cost for each resource-month
-            constraint = solver.Constraint(0.0, effort_estimate, f'effort_estimate_p{pid}')
+            constraint = model_proto.constraint.add(
+                lower_bound=0.0, upper_bound=effort_estimate, name=f'effort_estimate_p{pid}' if MODEL_NAMES else ''
+            )
             
             # Add coefficient for each variable: allocated_cost / resource_monthly_cost = FTE
-            for (resource_id, p, month), var in variables.items():
-                if p == pid:  # Only for this project
-                    resource_row = resources_df[resources_df['brid'] == resource_id].iloc[0]
-                    resource_monthly_cost = float(resource_row['cost_per_month'])
-                    if resource_monthly_cost > 0:
-                        # Coefficient = 1 / resource_monthly_cost (to convert cost to FTE)
-                        # When multiplied by allocated_cost variable, gives FTE
-                        constraint.SetCoefficient(var, 1.0 / resource_monthly_cost)
+            for resource_id, _, var in vars_by_project.get(pid, []):
+                resource_monthly_cost = resource_monthly_costs[resource_id]
+                if resource_monthly_cost > 0:
+                    # Coefficient = 1 / resource_monthly_cost (to convert cost to FTE)
+                    # When multiplied by allocated_cost variable, gives FTE
+                    constraint.var_index.append(var)
+                    constraint.coefficient.append(1.0 / resource_monthly_cost)
     
     # Objective function: Maximize allocation with preferences
-    objective = solver.Objective()
-    objective.SetMaximization()
+    model_proto.maximize = True
     
     # Calculate max priority for waterfall multiplier
     max_priority = max(project_priorities.values()) if project_priorities else 1.0
@@ -486,42 +527,67 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
         resource_location = resource_locations.get(resource_id, '')
         if resource_location:
             project_region_variable_counts[pid][resource_location] += 1
+    project_region_variable_totals = {
+        pid: sum(region_counts.values()) for pid, region_counts in project_region_variable_counts.items()
+    }
+    
+    # Project-level part of each coefficient (base, hierarchy waterfall factors, effort preference),
+    # computed once per project rather than once per variable
+    project_coeffs = {}  # pid -> (base + funding source + driver + rank + priority coeff, effort coeff)
+    pair_coeffs = {}  # (resource_id, pid) -> total objective coefficient
     
     # Calculate region diversity bonus for each variable
     for (resource_id, pid, month), var in variables.items():
-        resource_row = resources_df[resources_df['brid'] == resource_id].iloc[0]
+        # No term depends on the month, so each (resource, project) pair is scored once
+        # and its coefficient reused for the pair's other months
+        pair_coeff = pair_coeffs.get((resource_id, pid))
+        if pair_coeff is not None:
+            if pair_coeff != 0.0:
+                model_proto.variable[var].objective_coefficient = pair_coeff
+            continue
+        
         proj_info = project_data[pid]
         resource_location = resource_locations.get(resource_id, '')
         
-        # Base coefficient: cost allocated (maximize allocation)
-        # Use a very large base coefficient to prioritize full utilization
-        # For budgeted projects, use extremely high base to ensure they get filled first
-        # This ensures the solver maximizes allocation to budgeted projects before efficiency projects
-        if proj_info['is_efficiency']:
-            base_coeff = 1.0  # Lower base for efficiency projects
-        else:
-            base_coeff = 100000.0  # Extremely high base for budgeted projects to ensure full utilization
-        
-        # NEW HIERARCHY ORDER:
-        # 1. Funding Source (waterfall - strongest, don't move budget between funding sources)
-        funding_source_priority = proj_info.get('funding_source_priority', 0.5)
-        funding_source_factor = 1.0 / (funding_source_waterfall_multiplier ** (max_funding_source_priority - funding_source_priority))
-        funding_source_coeff = priority_weight * funding_source_factor * 20.0  # Strongest preference
-        
-        # 2. Driver priority multiplier (within funding source - driver waterfall effect)
-        driver_priority = proj_info.get('driver_priority', 0.5)
-        driver_factor = 1.0 / (driver_waterfall_multiplier ** (max_driver_priority - driver_priority))
-        driver_coeff = priority_weight * driver_factor * 10.0  # Very strong preference
-        
-        # 3. Rank within (funding_source + driver) combination (user-entered rank)
-        driver_rank = proj_info.get('driver_rank', 999)
-        rank_factor = 1.0 / (driver_rank_waterfall_multiplier ** (driver_rank - 1))  # Rank 1 gets highest factor
-        rank_coeff = priority_weight * rank_factor * 5.0  # Strong preference
+        if pid not in project_coeffs:
+            # Base coefficient: cost allocated (maximize allocation)
+            # Use a very large base coefficient to prioritize full utilization
+            # For budgeted projects, use extremely high base to ensure they get filled first
+            # This ensures the solver maximizes allocation to budgeted projects before efficiency projects
+            if proj_info['is_efficiency']:
+                base_coeff = 1.0  # Lower base for efficiency projects
+            else:
+                base_coeff = 100000.0  # Extremely high base for budgeted projects to ensure full utilization
+            
+            # NEW HIERARCHY ORDER:
+            # 1. Funding Source (waterfall - strongest, don't move budget between funding sources)
+            funding_source_priority = proj_info.get('funding_source_priority', 0.5)
+            funding_source_factor = _waterfall_factor(funding_source_waterfall_multiplier, max_funding_source_priority - funding_source_priority)
+            funding_source_coeff = priority_weight * funding_source_factor * 20.0  # Strongest preference
+            
+            # 2. Driver priority multiplier (within funding source - driver waterfall effect)
+            driver_priority = proj_info.get('driver_priority', 0.5)
+            driver_factor = _waterfall_factor(driver_waterfall_multiplier, max_driver_priority - driver_priority)
+            driver_coeff = priority_weight * driver_factor * 10.0  # Very strong preference
+            
+            # 3. Rank within (funding_source + driver) combination (user-entered rank)
+            driver_rank = proj_info.get('driver_rank', 999)
+            rank_factor = _waterfall_factor(driver_rank_waterfall_multiplier, driver_rank - 1)  # Rank 1 gets highest factor
+            rank_coeff = priority_weight * rank_factor * 5.0  # Strong preference
+            
+            # Project priority multiplier (waterfall effect within funding_source and driver)
+            priority = proj_info['priority']
+            priority_factor = _waterfall_factor(waterfall_multiplier, max_priority - priority)
+            priority_coeff = priority_weight * priority_factor
+            
+            # Effort estimate alignment (if available)
+            # Prefer allocations closer to the effort target (soft constraint)
+            # This is approximated in objective - actual alignment calculated post-solution
+            effort_coeff = effort_weight * 0.5 if proj_info['effort_estimate'] else 0.0  # Neutral preference
+            
+            project_coeffs[pid] = (base_coeff + funding_source_coeff + driver_coeff + rank_coeff + priority_coeff, effort_coeff)
         
-        # Project priority multiplier (waterfall effect within funding_source and driver)
-        priority = proj_info['priority']
-        priority_factor = 1.0 / (waterfall_multiplier ** (max_priority - priority))
-        priority_coeff = priority_weight * priority_factor
+        project_coeff, effort_coeff = project_coeffs[pid]
         
         # Team/Sub-team/Pod alignment preference (STRONGER than skill matching)
         # This is checked BEFORE skill matching - resources matching team/sub_team/pod are strongly preferred
@@ -533,15 +599,6 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
         skill_match = skill_scores.get((resource_id, pid), {'overall_score': 0.5})
         skill_coeff = skill_weight * skill_match['overall_score']
         
-        # Effort estimate alignment (if available)
-        effort_coeff = 0.0
-        if proj_info['effort_estimate']:
-            # Calculate target allocation for effort
-            target_per_month = (proj_info['effort_estimate'] * resource_row['cost_per_month']) / len(proj_info['months'])
-            # Prefer allocations closer to target (soft constraint)
-            # This is approximated in objective - actual alignment calculated post-solution
-            effort_coeff = effort_weight * 0.5  # Neutral preference
-        
         # Region diversity bonus (soft constraint)
         # Strategy: Give higher bonus to allocations from regions that are less common for this project
         # This encourages the solver to spread allocations across regions
@@ -549,7 +606,7 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
         if REGION_DIVERSITY_WEIGHT > 0 and resource_location and max_regions > 0:
             # Count how many variables this project has from each region
             region_counts = project_region_variable_counts[pid]
-            total_vars_for_project = sum(region_counts.values())
+            total_vars_for_project = project_region_variable_totals.get(pid, 0)
             
             if total_vars_for_project > 0:
                 # Calculate how common this region is for this project
@@ -569,16 +626,27 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
         # Team alignment is STRONGER than skill matching - prefer team/sub_team/pod matches first
         # If no team alignment, skill matching provides fallback preference
         # Region diversity bonus encourages cross-region allocation (higher for less common regions)
-        total_coeff = base_coeff + funding_source_coeff + driver_coeff + rank_coeff + priority_coeff + team_coeff + skill_coeff + effort_coeff + region_diversity_bonus
+        total_coeff = project_coeff + team_coeff + skill_coeff + effort_coeff + region_diversity_bonus
+        pair_coeffs[(resource_id, pid)] = total_coeff
         
-        objective.SetCoefficient(var, total_coeff)
+        # Zero is the proto default; leave the field unset rather than store it
+        if total_coeff != 0.0:
+            model_proto.variable[var].objective_coefficient = total_coeff
     
     # Solve
+    load_error = solver.LoadModelFromProto(model_proto)
+    if load_error:
+        raise RuntimeError(f'Invalid LP model: {load_error}')
     status = solver.Solve()
     
     if status != pywraplp.Solver.OPTIMAL and status != pywraplp.Solver.FEASIBLE:
         raise RuntimeError(f'Solver failed with status: {status}')
     
+    # All variable values in one call, indexed like model_proto.variable
+    solution_response = linear_solver_pb2.MPSolutionResponse()
+    solver.FillSolutionResponseProto(solution_response)
+    solution_values = np.asarray(solution_response.variable_value, dtype=np.float64)
+    
     # Extract results
     allocations = []
     
@@ -588,70 +656,71 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
     # Track resource utilization per resource per month (to check if resources are fully utilized)
     resource_month_utilized = defaultdict(lambda: defaultdict(float))  # resource_id -> month -> allocated_cost
     
-    for (resource_id, pid, month), var in variables.items():
-        allocated_cost = var.solution_value()
+    # Only a small fraction of the variables end up non-zero: pick those out in one pass
+    # instead of testing every variable in Python, and map them back through variable_keys
+    nonzero_vars = np.flatnonzero(solution_values > 0.001)  # Only non-zero allocations
+    for var, allocated_cost in zip(nonzero_vars.tolist(), solution_values[nonzero_vars].tolist()):
+        resource_id, pid, month = variable_keys[var]
+        resource_name = resource_names.get(resource_id, resource_id)
+        proj_info = project_data[pid]
         
-        if allocated_cost > 0.001:  # Only non-zero allocations
-            resource_row = resources_df[resources_df['brid'] == resource_id].iloc[0]
-            proj_info = project_data[pid]
-            
-            # Track allocated budget
-            project_month_allocated[pid][month] += allocated_cost
-            
-            # Track resource utilization
-            resource_month_utilized[resource_id][month] += allocated_cost
-            
-            # Get skill scores
-            skill_match = skill_scores.get((resource_id, pid), {'overall_score': 0.5})
-            
-            # Calculate effort alignment
-            effort_alignment = calculate_effort_alignment(
-                allocated_cost,
-                float(resource_row['cost_per_month']),
-                proj_info['effort_estimate'],
-                len(proj_info['months'])
-            )
-            
-            # Generate explanation using utility function
-            priority_score = proj_info['priority']
-            project_rank = None  # Could be calculated from sorted projects
-            team_alignment = team_alignment_scores.get((resource_id, pid), 0.0)
-            explanation = generate_allocation_explanation(
-                resource_id=resource_id,
-                resource_name=str(resource_row.get('employee_name', resource_id)),
-                project_id=pid,
-                project_name=proj_info['project_name'],
-                allocated_cost=allocated_cost,
-                priority_score=priority_score,
-                skill_scores={
-                    'overall_score': skill_match['overall_score'],
-                    'technical_score': skill_match.get('technical_score', 0.0),
-                    'functional_score': skill_match.get('functional_score', 0.0),
-                    'mandatory_met': True  # Already filtered by mandatory skills check
-                },
-                effort_alignment=effort_alignment,
-                is_efficiency_project=proj_info['is_efficiency'],
-                project_rank=project_rank,
-                team_alignment=team_alignment
-            )
-            
-            allocations.append({
-                'resource_id': resource_id,
-                'resource_name': str(resource_row.get('employee_name', resource_id)),
-                'project_id': pid,
-                'project_name': proj_info['project_name'],
-                'month': month,
-                'allocated_cost': round(allocated_cost),  # Round currency to nearest whole number
-                'priority_score': priority_score,
-                'skill_match_score': skill_match['overall_score'],
-                'effort_alignment': effort_alignment,
-                'explanation': explanation
-            })
-    
+        # Track allocated budget
+        project_month_allocated[pid][month] += allocated_cost
+        
+        # Track resource utilization
+        resource_month_utilized[resource_id][month] += allocated_cost
+        
+        # Get skill scores
+        skill_match = skill_scores.get((resource_id, pid), {'overall_score': 0.5})
+        
+        # Calculate effort alignment
+        effort_alignment = calculate_effort_alignment(
+            allocated_cost,
+            resource_monthly_costs[resource_id],
+            proj_info['effort_estimate'],
+            len(proj_info['months'])
+        )
+        
+        # Generate explanation using utility function
+        priority_score = proj_info['priority']
+        project_rank = None  # Could be calculated from sorted projects
+        team_alignment = team_alignment_scores.get((resource_id, pid), 0.0)
+        explanation = generate_allocation_explanation(
+            resource_id=resource_id,
+            resource_name=resource_name,
+            project_id=pid,
+            project_name=proj_info['project_name'],
+            allocated_cost=allocated_cost,
+            priority_score=priority_score,
+            skill_scores={
+                'overall_score': skill_match['overall_score'],
+                'technical_score': skill_match.get('technical_score', 0.0),
+                'functional_score': skill_match.get('functional_score', 0.0),
+                'mandatory_met': True  # Already filtered by mandatory skills check
+            },
+            effort_alignment=effort_alignment,
+            is_efficiency_project=proj_info['is_efficiency'],
+            project_rank=project_rank,
+            team_alignment=team_alignment
+        )
+        
+        allocations.append({
+            'resource_id': resource_id,
+            'resource_name': resource_name,
+            'project_id': pid,
+            'project_name': proj_info['project_name'],
+            'month': month,
+            'allocated_cost': round(allocated_cost),  # Round currency to nearest whole number
+            'priority_score': priority_score,
+            'skill_match_score': skill_match['overall_score'],
+            'effort_alignment': effort_alignment,
+            'explanation': explanation
+        })
+
     # Create dummy resources for remaining budget
     # Only create dummy resources if there are no available resources that could fulfill the remaining budget
     dummy_resources = _create_dummy_resources_for_remaining_budget(
-        project_data, project_month_allocated, resource_month_utilized, resources_df, 
+        project_data, project_month_allocated, resource_month_utilized, resources_df, resource_cost_per_month,
         resource_available_months, resource_teams, all_months, variables
     )
     allocations.extend(dummy_resources)
@@ -661,8 +730,8 @@ def budget_allocator(resources_df: pd.DataFrame, projects_df: pd.DataFrame,
 
 def _create_dummy_resources_for_remaining_budget(
     project_data: Dict, project_month_allocated: Dict, resource_month_utilized: Dict,
-    resources_df: pd.DataFrame, resource_available_months: Dict, resource_teams: Dict,
-    all_months: List[str], variables: Dict
+    resources_df: pd.DataFrame, resource_cost_per_month: pd.Series, resource_available_months: Dict,
+    resource_teams: Dict, all_months: List[str], variables: Dict
 ) -> List[Dict]:
     """Create dummy resources for remaining budget after allocation.
     
@@ -674,6 +743,7 @@ def _create_dummy_resources_for_remaining_budget(
         project_month_allocated: Dictionary tracking allocated budget per project per month
         resource_month_utilized: Dictionary tracking resource utilization per resource per month
         resources_df: DataFrame with existing resources (for cost/location reference)
+        resource_cost_per_month: Monthly cost per resource, aligned with resources_df rows
         resource_available_months: Dictionary of resource_id -> set of available months
         resource_teams: Dictionary of resource_id -> {team, sub_team, pod}
         all_months: List of all months in the allocation period
@@ -686,13 +756,13 @@ def _create_dummy_resources_for_remaining_budget(
     
     # Calculate average cost per month from existing resources (for cost balance)
     if len(resources_df) > 0:
-        avg_monthly_cost = resources_df['cost_per_month'].mean()
+        avg_monthly_cost = resource_cost_per_month.mean()
     else:
         avg_monthly_cost = 10000.0  # Default if no resources
     
     # Get location distribution from existing resources (for location balance)
     location_counts = defaultdict(int)
-    for _, resource_row in resources_df.iterrows():
+    for resource_row in resources_df.to_dict('records'):
         location = str(resource_row.get('location', '')).strip()
         if location:
             location_counts[location] += 1
@@ -736,7 +806,7 @@ def _create_dummy_resources_for_remaining_budget(
                 # Check if there are existing resources that could fulfill this remaining budget
                 # but aren't allocated (due to constraints)
                 has_available_resources = _check_if_resources_available_for_project(
-                    pid, month, remaining_budget, proj_info, resources_df,
+                    pid, month, remaining_budget, proj_info, resources_df, resource_cost_per_month,
                     resource_month_utilized, resource_available_months, resource_teams, variables
                 )
                 
@@ -777,16 +847,16 @@ def _create_dummy_resources_for_remaining_budget(
 
 def _check_if_resources_available_for_project(
     pid: int, month: str, remaining_budget: float, proj_info: Dict,
-    resources_df: pd.DataFrame, resource_month_utilized: Dict,
+    resources_df: pd.DataFrame, resource_cost_per_month: pd.Series, resource_month_utilized: Dict,
     resource_available_months: Dict, resource_teams: Dict, variables: Dict
 ) -> bool:
     """Check if there are existing resources that could fulfill the remaining budget.
     
-    A resource is considered "available" if:
+    A resource is considered "available" if it has a variable for this project and month
+    (so it met the mandatory skills and was available that month) and:
     1. It's in the same team (if project specifies team)
-    2. It meets skill requirements (would have passed mandatory skills check)
-    3. It's available in that month
-    4. It has remaining capacity in that month
+    2. It meets the pod/sub_team requirement (if project specifies one)
+    3. It has remaining capacity in that month
     
     Args:
         pid: Project ID
@@ -794,6 +864,7 @@ def _check_if_resources_available_for_project(
         remaining_budget: Remaining budget to fulfill
         proj_info: Project information dictionary
         resources_df: DataFrame with all resources
+        resource_cost_per_month: Monthly cost per resource, aligned with resources_df rows
         resource_month_utilized: Dictionary tracking resource utilization
         resource_available_months: Dictionary of resource availability
         resource_teams: Dictionary of resource team information
@@ -802,17 +873,17 @@ def _check_if_resources_available_for_project(
     Returns:
         True if there are available resources that could fulfill the budget, False otherwise
     """
-    from utils import check_mandatory_skills
-    
     preferred_team = proj_info.get('preferred_team', '')
     preferred_sub_team = proj_info.get('preferred_sub_team', '')
     preferred_pod = proj_info.get('preferred_pod', '')
-    required_skills = proj_info.get('required_skills', {})
     
     # Check each resource
-    for _, resource_row in resources_df.iterrows():
-        resource_id = str(resource_row['brid'])
-        resource_monthly_cost = float(resource_row['cost_per_month'])
+    for resource_id, resource_monthly_cost in zip(resources_df['brid'].astype(str), resource_cost_per_month):
+        # A variable for this resource-project-month means the resource passed the mandatory skills
+        # matrix and was available that month when the model was built; without one it cannot help
+        var_key = (resource_id, pid, month)
+        if var_key not in variables:
+            continue
         
         # Check 1: Team constraint (if project specifies team, resource must be from that team)
         if preferred_team:
@@ -839,28 +910,33 @@ def _check_if_resources_available_for_project(
                 if not sub_team_match:
                     continue  # Doesn't meet sub_team requirement
         
-        # Check 3: Mandatory skills (resource must meet mandatory skills)
-        can_allocate, _ = check_mandatory_skills(resource_row, required_skills)
-        if not can_allocate:
-            continue  # Doesn't meet mandatory skills
-        
-        # Check 4: Availability in that month
-        available_months = resource_available_months.get(resource_id, set())
-        if month not in available_months:
-            continue  # Not available in that month
-        
-        # Check 5: Has remaining capacity in that month
+        # Check 3: Has remaining capacity in that month
+        # The variable exists, so the resource could have been allocated but wasn't (due to other constraints)
         utilized_this_month = resource_month_utilized.get(resource_id, {}).get(month, 0.0)
         remaining_capacity = resource_monthly_cost - utilized_this_month
         
-        # Check 6: Check if a variable exists for this resource-project-month (means it was possible to allocate)
-        # If variable exists, it means the resource could have been allocated but wasn't (due to other constraints)
-        var_key = (resource_id, pid, month)
-        if var_key in variables:
-            # Variable exists - resource could have been allocated
-            # Check if it has enough capacity to fulfill remaining budget
-            if remaining_capacity >= remaining_budget * 0.01:  # At least 1% of remaining budget
-                return True  # Found an available resource
+        # Check if it has enough capacity to fulfill remaining budget
+        if remaining_capacity >= remaining_budget * 0.01:  # At least 1% of remaining budget
+            return True  # Found an available resource
     
     # No available resources found
     return False
+
+
+def _waterfall_factor(multiplier: float, steps: float) -> float:
+    """Waterfall weight 1 / multiplier**steps for an entry `steps` places below the top.
+    
+    Far down the waterfall (e.g. the default driver rank of 999) the power no longer fits in a
+    float; the weight is then 0.0 instead of raising OverflowError.
+    
+    Args:
+        multiplier: Waterfall multiplier (> 1)
+        steps: Distance from the top entry (0 = top)
+    
+    Returns:
+        Weight in (0, 1], or 0.0 when the power overflows
+    """
+    try:
+        return 1.0 / (multiplier ** steps)
+    except OverflowError:
+        return 0.0
@@ -13,6 +13,11 @@ PRIORITY_WATERFALL_MULTIPLIER = 100.0
 # Solver type: 'GLOP' for continuous, 'CBC' for integer/mixed-integer
 SOLVER_TYPE = 'GLOP'
 
+# Give every LP variable/constraint a readable name (e.g. x_R001_p3_m2025-01).
+# Only useful when dumping or debugging the model; off by default because
+# formatting one string per variable and row is a noticeable share of build time
+MODEL_NAMES = False
+
 # Skill matching thresholds
 MIN_SKILL_MATCH_SCORE = 0.0  # Minimum skill match to consider (0.0 = any match)
 
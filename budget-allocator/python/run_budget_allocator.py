@@ -453,14 +453,17 @@ def generate_gantt_chart(allocations_df: pd.DataFrame, resources_df: pd.DataFram
     allocations_with_fte['driver'] = allocations_with_fte['driver'].fillna('')
     
     # Calculate percentage allocation for each resource-month
-    allocations_with_fte['pct_allocation'] = 0.0
-    for idx, row in allocations_with_fte.iterrows():
-        resource_id = row['resource_id']
-        resource_row = resources_df[resources_df['brid'] == resource_id]
-        if not resource_row.empty:
-            resource_monthly_cost = resource_row.iloc[0]['cost_per_year'] / 12.0
-            if resource_monthly_cost > 0:
-                allocations_with_fte.at[idx, 'pct_allocation'] = round((row['allocated_cost'] / resource_monthly_cost * 100), 2)  # Round percentage to 2 decimal places
+    # Monthly cost per BRID (first row wins), instead of filtering resources_df per allocation
+    first_resources = resources_df.drop_duplicates('brid')
+    resource_monthly_costs = dict(zip(first_resources['brid'], (first_resources['cost_per_year'] / 12.0).to_numpy()))
+    pct_allocations = []
+    for resource_id, allocated_cost in zip(allocations_with_fte['resource_id'], allocations_with_fte['allocated_cost']):
+        resource_monthly_cost = resource_monthly_costs.get(resource_id, 0.0)
+        if resource_monthly_cost > 0:
+            pct_allocations.append(round((allocated_cost / resource_monthly_cost * 100), 2))  # Round percentage to 2 decimal places
+        else:
+            pct_allocations.append(0.0)
+    allocations_with_fte['pct_allocation'] = pct_allocations
     
     # Get unique months
     months = sorted(allocations_with_fte['month'].unique())
@@ -738,6 +741,12 @@ def create_pivot_table_sheet(wb, allocations_with_fte: pd.DataFrame, projects_df
     # Create pivot table data
     pivot_data = []
     
+    # Funding source and driver per project id (first row wins), instead of filtering projects_df per allocation
+    project_meta = {
+        proj_row['project_id']: (proj_row.get('funding_source', ''), proj_row.get('driver', ''))
+        for proj_row in projects_df.drop_duplicates('project_id').to_dict('records')
+    }
+    
     for _, alloc_row in allocations_with_fte.iterrows():
         resource_id = alloc_row['resource_id']
         resource_name = alloc_row['resource_name']
@@ -749,13 +758,7 @@ def create_pivot_table_sheet(wb, allocations_with_fte: pd.DataFrame, projects_df
         pct_allocation = alloc_row['pct_allocation']
         
         # Get project metadata
-        proj_row = projects_df[projects_df['project_id'] == project_id]
-        if not proj_row.empty:
-            funding_source = proj_row.iloc[0].get('funding_source', '')
-            driver = proj_row.iloc[0].get('driver', '')
-        else:
-            funding_source = ''
-            driver = ''
+        funding_source, driver = project_meta.get(project_id, ('', ''))
         
         pivot_data.append({
             'Funding Source': funding_source,
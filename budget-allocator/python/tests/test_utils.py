@@ -0,0 +1,81 @@
+"""Tests for the vectorised skill checks in utils.py"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import (
+    calculate_skill_match_matrix,
+    calculate_skill_match_score,
+    check_mandatory_skills,
+    check_mandatory_skills_matrix,
+    parse_required_skills,
+)
+
+# Project requirements in the forms the Projects sheet accepts: JSON, AND/OR strings,
+# regex patterns, mixed case, and no requirements at all
+PROJECT_SKILLS = [
+    parse_required_skills(field) for field in [
+        '{"technical": ["python", "sql"], "functional": ["risk"], "mandatory": ["python"]}',
+        '{"technical": ["Python"], "functional": ["PRICING", "Risk"], "mandatory": ["SQL"]}',
+        '{"technical": ["java"], "mandatory_or": ["Java", "sql"]}',
+        'python|java',
+        'python,sql',
+        'java&sql|risk',
+        'regex:^sq',
+        'py.*',
+        np.nan,
+        '',
+    ]
+] + [
+    {'mandatory_and': [' Python '], 'technical_or': ['JAVA', ' sql'], 'functional_and': ['pricing', 'pricing']},
+    {},
+]
+
+SKILL_KEYS = [
+    'technical_score', 'functional_score', 'overall_score',
+    'technical_and_matches', 'technical_or_matches', 'functional_and_matches', 'functional_or_matches',
+]
+
+
+@pytest.mark.parametrize('technical_skills, functional_skills', [
+    ('', ''),
+    (np.nan, np.nan),
+    (None, None),
+    ('python,sql', 'risk,pricing'),
+    ('Python, SQL', 'RISK'),
+    ('JAVA', 'Pricing,risk'),
+    ('python', np.nan),
+    (np.nan, 'risk'),
+    ('sql,python,java', ''),
+])
+def test_skill_matrices_match_row_checks(technical_skills, functional_skills):
+    # A second, different resource keeps the skill strings from all being identical
+    resources = pd.DataFrame({
+        'technical_skills': [technical_skills, 'java'],
+        'functional_skills': [functional_skills, 'pricing'],
+    })
+    
+    mandatory = check_mandatory_skills_matrix(resources, PROJECT_SKILLS)
+    scores = calculate_skill_match_matrix(resources, PROJECT_SKILLS)
+    
+    assert mandatory.shape == (len(resources), len(PROJECT_SKILLS))
+    for r, (_, row) in enumerate(resources.iterrows()):
+        for p, project_skills in enumerate(PROJECT_SKILLS):
+            assert mandatory[r, p] == check_mandatory_skills(row, project_skills)[0]
+            expected = calculate_skill_match_score(row, project_skills)
+            for key in SKILL_KEYS:
+                assert scores[key][r, p] == pytest.approx(expected[key]), (key, r, p)
+
+
+def test_skill_matrices_without_skill_columns():
+    resources = pd.DataFrame({'brid': ['R1', 'R2']})
+    
+    mandatory = check_mandatory_skills_matrix(resources, PROJECT_SKILLS)
+    scores = calculate_skill_match_matrix(resources, PROJECT_SKILLS)
+    
+    for r, (_, row) in enumerate(resources.iterrows()):
+        for p, project_skills in enumerate(PROJECT_SKILLS):
+            assert mandatory[r, p] == check_mandatory_skills(row, project_skills)[0]
+            expected = calculate_skill_match_score(row, project_skills)
+            for key in SKILL_KEYS:
+                assert scores[key][r, p] == pytest.approx(expected[key]), (key, r, p)
@@ -1,8 +1,10 @@
 """utils.py - Helper functions for budget allocator"""
 import pandas as pd
+import numpy as np
 import json
 import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 from config import PRIORITY_WEIGHTS
 
@@ -23,10 +25,16 @@ def months_range(start_date: str, end_date: str) -> List[str]:
     if len(end_date) == 10:  # YYYY-MM-DD
         end_date = end_date[:7]
     
+    # Projects usually share a handful of date pairs; callers get their own list
+    return list(_months_range_cached(start_date, end_date))
+
+
+@lru_cache(maxsize=1024)
+def _months_range_cached(start_date: str, end_date: str) -> Tuple[str, ...]:
+    """Cached body of months_range for already-normalized YYYY-MM dates."""
     start = pd.to_datetime(start_date + "-01")
     end = pd.to_datetime(end_date + "-01")
-    months = pd.date_range(start=start, end=end, freq='MS').strftime('%Y-%m').tolist()
-    return months
+    return tuple(pd.date_range(start=start, end=end, freq='MS').strftime('%Y-%m'))
 
 
 def parse_available_months(available_months_str: str, all_months: List[str]) -> set:
@@ -353,11 +361,13 @@ def parse_required_skills(field) -> Dict[str, List[str]]:
         }
 
 
+@lru_cache(maxsize=1024)
 def normalize_driver(driver: str) -> float:
     """Normalize driver to 0-1 scale.
     
     Common drivers: Regulatory, Strategic, Product, Operational, etc.
     Higher priority drivers get higher scores.
+    Results are cached: projects share a small set of driver values.
     """
     if pd.isna(driver) or not driver:
         return 0.5  # Default medium
@@ -604,6 +614,128 @@ def check_mandatory_skills(resource_row: pd.Series, project_skills: Dict[str, Li
     }
 
 
+def _resource_skill_strings(resources_df: pd.DataFrame, column: str) -> List[str]:
+    """Resource skill column as strings, the way the row-wise skill checks read it."""
+    if column not in resources_df.columns:
+        return [''] * len(resources_df)
+    return [str(skills or '') for skills in resources_df[column]]
+
+
+def _skill_term_matrices(project_skill_lists: List[List[str]], resource_skills: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Match each project's skill patterns against resource skill strings via a shared vocabulary.
+    
+    Args:
+        project_skill_lists: Skill patterns (regex or literal) per project
+        resource_skills: Skill string per resource
+    
+    Returns:
+        Tuple of (hits, counts): hits is (resources x patterns), 1.0 where the pattern matches
+        the resource; counts is (projects x patterns), how often the project lists the pattern
+    """
+    # skill pattern -> vocabulary index
+    vocab = {}
+    project_terms = [[vocab.setdefault(str(skill), len(vocab)) for skill in skills] for skills in project_skill_lists]
+    
+    # Resources often share a skills string: match each distinct string once, then
+    # expand to one row per resource
+    distinct_skills = {}
+    resource_rows = np.fromiter(
+        (distinct_skills.setdefault(skills, len(distinct_skills)) for skills in resource_skills),
+        dtype=np.intp, count=len(resource_skills)
+    )
+    
+    # distinct skills string x pattern hits, one pass over the strings per distinct pattern
+    distinct_hits = np.zeros((len(distinct_skills), len(vocab)), dtype=np.float64)
+    for skill, t in vocab.items():
+        distinct_hits[:, t] = [_match_skill(skill, skills) for skills in distinct_skills]
+    hits = distinct_hits[resource_rows]
+    
+    counts = np.zeros((len(project_skill_lists), len(vocab)), dtype=np.float64)
+    for p, terms in enumerate(project_terms):
+        np.add.at(counts[p], terms, 1.0)
+    return hits, counts
+
+
+def check_mandatory_skills_matrix(resources_df: pd.DataFrame, project_skills_list: List[Dict[str, List[str]]]) -> np.ndarray:
+    """Evaluate the mandatory-skill hard constraint for every resource/project pair at once.
+    
+    Gives the same answer as check_mandatory_skills(resource_row, project_skills)[0] for each
+    pair. Distinct mandatory skill patterns are collected into a shared vocabulary and each
+    is matched against every resource once; the projects' AND/OR requirements are then
+    combined with those hits in matrix products.
+    
+    Args:
+        resources_df: Resource data with 'technical_skills', 'functional_skills'
+        project_skills_list: Parsed project skills dicts (see parse_required_skills)
+    
+    Returns:
+        Boolean array of shape (len(resources_df), len(project_skills_list)),
+        True where the resource meets the project's mandatory skills
+    """
+    resource_all_skills = [
+        tech + ',' + func for tech, func in zip(
+            _resource_skill_strings(resources_df, 'technical_skills'),
+            _resource_skill_strings(resources_df, 'functional_skills')
+        )
+    ]
+    and_hits, and_counts = _skill_term_matrices(
+        [project_skills.get('mandatory_and', []) for project_skills in project_skills_list], resource_all_skills
+    )
+    or_hits, or_counts = _skill_term_matrices(
+        [project_skills.get('mandatory_or', []) for project_skills in project_skills_list], resource_all_skills
+    )
+    
+    # AND: no required pattern missing; OR: at least one pattern hit (or no OR requirement)
+    and_met = ((1.0 - and_hits) @ and_counts.T) == 0
+    or_met = ((or_hits @ or_counts.T) > 0) | (or_counts.sum(axis=1) == 0)
+    return and_met & or_met
+
+
+def calculate_skill_match_matrix(resources_df: pd.DataFrame, project_skills_list: List[Dict[str, List[str]]]) -> Dict[str, np.ndarray]:
+    """Calculate skill match scores for every resource/project pair at once.
+    
+    Element [r, p] of each array equals the same key of
+    calculate_skill_match_score(resource r, project_skills_list[p]).
+    
+    Args:
+        resources_df: Resource data with 'technical_skills', 'functional_skills'
+        project_skills_list: Parsed project skills dicts (see parse_required_skills)
+    
+    Returns:
+        Dict of (resources x projects) arrays: 'technical_score', 'functional_score',
+        'overall_score' and the '<kind>_<and|or>_matches' counts
+    """
+    match_counts = {}
+    kind_scores = {}
+    for kind, column in (('technical', 'technical_skills'), ('functional', 'functional_skills')):
+        resource_skills = _resource_skill_strings(resources_df, column)
+        kind_score = None
+        for op in ('and', 'or'):
+            hits, counts = _skill_term_matrices(
+                [[str(s).strip() for s in project_skills.get(f'{kind}_{op}', [])] for project_skills in project_skills_list],
+                resource_skills
+            )
+            matches = hits @ counts.T
+            n_required = counts.sum(axis=1)
+            if op == 'and':
+                # Fraction of AND skills matched; no AND requirements = perfect
+                op_score = np.divide(matches, n_required, out=np.ones_like(matches), where=n_required > 0)
+            else:
+                # At least one OR skill = 1.0, none = 0.0; no OR requirements = perfect
+                op_score = np.where((matches > 0) | (n_required == 0), 1.0, 0.0)
+            match_counts[f'{kind}_{op}_matches'] = matches.astype(int)
+            kind_score = op_score if kind_score is None else np.minimum(kind_score, op_score)
+        kind_scores[kind] = kind_score
+    
+    return {
+        'technical_score': kind_scores['technical'],
+        'functional_score': kind_scores['functional'],
+        # Overall score (weighted average: technical 60%, functional 40%)
+        'overall_score': 0.6 * kind_scores['technical'] + 0.4 * kind_scores['functional'],
+        **match_counts
+    }
+
+
 def calculate_skill_match_score(resource_row: pd.Series, project_skills: Dict[str, List[str]]) -> Dict[str, float]:
     """Calculate skill match score for technical and functional skills with AND/OR and regex support.
     